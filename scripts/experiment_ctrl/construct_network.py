@@ -9,12 +9,18 @@
 # directory for more details.
 
 import argparse
+import collections
+import csv
+import json
 import logging
+import math
 import matplotlib as mpl
+import multiprocessing
 import networkx as nx
+import numpy as np
 import os
-from queue import Queue
 import random
+import time
 from iotlab_controller.common import get_default_api, get_uri
 from iotlab_controller.nodes import SinkNetworkedNodes
 
@@ -31,6 +37,8 @@ DATA_PATH = os.environ.get("DATA_PATH",
                            os.path.join(SCRIPT_PATH, "..", "..", "results"))
 
 DEFAULT_IOTLAB_SITE = "lille"
+# Maximum age of a cached site inventory in seconds
+INVENTORY_TTL = 60 * 60
 
 ARCHI_SHORT = "m3"
 ARCHI_FULL = "m3:at86rf231"
@@ -42,6 +50,28 @@ MIN_NEIGHBORS = 1
 MAX_NEIGHBORS = 3
 MAX_NODES = 50
 
+# Batch construction parameters
+TOP_NETWORKS = 5
+# Number of hop counts the sources of a network should spread over evenly
+# (the hop counts plotted by plot_results.py)
+SCORE_DEPTH = 7
+SCORE_WEIGHTS = {
+    "hops": 1,
+    "fanout": 1,
+    "spacing": 1,
+    "link_quality": 1,
+}
+# Networks constructed per sink when ranking sinks
+RANK_RUNS = 10
+# construction parameters and link qualities of a batch construction
+# process, see construct_networks()
+_BATCH_ARGS = None
+_BATCH_LINK_QUALITY = None
+# pairwise distances and construction parameters of a sink ranking process,
+# see rank_sinks()
+_RANK_DISTANCES = None
+_RANK_ARGS = None
+
 SINK_COLOR = "#330099"
 SINK_NEIGHBORS_COLOR = "#d3d3d3"
 SOURCE_COLOR = "#b5a3da"
@@ -58,6 +88,86 @@ class NetworkConstructionError(Exception):
     pass
 
 
+def _exp_list(nums):
+    # node numbers in the short format of IoT-LAB, e.g. "1-5+7"
+    ranges = []
+    for num in sorted(set(nums)):
+        if ranges and ranges[-1][1] == num - 1:
+            ranges[-1][1] = num
+        else:
+            ranges.append([num, num])
+    return "+".join(str(first) if first == last else
+                    "{}-{}".format(first, last) for first, last in ranges)
+
+
+class InventoryApi(object):
+    """
+    Stand-in for the IoT-LAB API (`iotlabcli.rest.Api`) that serves the
+    nodes of site inventories (see `load_inventory()`), so networks can be
+    constructed without network access.
+    """
+    def __init__(self, *inventories):
+        self.nodes = [n for inventory in inventories
+                      for n in inventory["nodes"]]
+
+    def get_nodes(self, list_id=False, site=None, **selections):
+        if site is not None:
+            selections["site"] = site
+        nodes = [n for n in self.nodes
+                 if all(n.get(k) == v for k, v in selections.items())]
+        if not list_id:
+            return {"items": nodes}
+        # node numbers by site, architecture, and state like the nodes/ids
+        # resource of the API
+        ids = {}
+        for n in nodes:
+            ids.setdefault(n["site"], {}).setdefault(n["archi"], {}) \
+                .setdefault(n["state"], []) \
+                .append(_node_num(n["network_address"]))
+        return {"items": [
+            {"site": site, "archis": [
+                {"archi": archi, "states": [
+                    {"state": state, "ids": _exp_list(nums)}
+                    for state, nums in states.items()
+                ]} for archi, states in archis.items()
+            ]} for site, archis in ids.items()
+        ]}
+
+
+class _NodeGrid(object):
+    """
+    Uniform grid over the x/y coordinates of nodes, so the nodes close to a
+    node can be found without comparing it to all nodes of a site.
+    """
+    def __init__(self, cell_size, nodes=()):
+        self.cell_size = cell_size
+        self._cells = {}
+        for node in nodes:
+            self.add(node)
+
+    def _cell(self, node):
+        return (math.floor(node.x / self.cell_size),
+                math.floor(node.y / self.cell_size))
+
+    def add(self, node):
+        self._cells.setdefault(self._cell(node), []).append(node)
+
+    def within(self, node, distance):
+        """
+        Returns the nodes in the grid closer than `distance` to `node`.
+        """
+        # node.distance() also considers z, so every node closer than
+        # `distance` is in one of the cells within `distance` in x and y
+        reach = math.ceil(distance / self.cell_size)
+        cell_x, cell_y = self._cell(node)
+        res = []
+        for x in range(cell_x - reach, cell_x + reach + 1):
+            for y in range(cell_y - reach, cell_y + reach + 1):
+                res.extend(n for n in self._cells.get((x, y), ())
+                           if node.distance(n) < distance)
+        return res
+
+
 def draw_network(network, true_pos=True, *args, **kwargs):
     if true_pos:
         pos = {k: (network.network.nodes[k]["info"].x,
@@ -82,34 +192,185 @@ def draw_network(network, true_pos=True, *args, **kwargs):
     nx.draw(network.network, *args, **kwargs)
 
 
+def save_network(network):
+    draw_network(network, False, with_labels=True)
+    plt.savefig(os.path.join(DATA_PATH, "{}_logic.svg".format(network)),
+                dpi=150)
+    plt.clf()
+    draw_network(network, True, with_labels=True)
+    plt.savefig(os.path.join(DATA_PATH, "{}_geo.svg".format(network)),
+                dpi=150)
+    network.save_edgelist(
+        os.path.join(DATA_PATH, "{}.edgelist.gz".format(network))
+    )
+    plt.clf()
+
+
+def _pairwise_distances(pos):
+    """
+    Returns the matrix of the distances between all of the positions `pos`
+    (an array of (x, y, z) rows).
+    """
+    return np.sqrt(((pos[:, np.newaxis] - pos[np.newaxis]) ** 2).sum(axis=-1))
+
+
+def _fanout_balance(fanout):
+    fanout = [f for f in fanout if f > 0]
+    return 1 / (1 + np.std(fanout)) if fanout else 0.0
+
+
+def load_link_quality(filename):
+    """
+    Loads measured link qualities (between 0 and 1, e.g. the packet
+    reception ratio) from an edge-list with lines of the form
+    `<node1> <node2> <quality>`.
+    """
+    return nx.read_edgelist(filename, data=[("quality", float)])
+
+
+def score_network(network, link_quality=None, max_distance=MAX_DISTANCE):
+    """
+    Scores `network` by how evenly its sources spread over SCORE_DEPTH hop
+    counts ("hops"), how balanced the number of down-stream neighbors of its
+    forwarders is ("fanout"), the median distance of each node to the
+    node nearest to it relative to `max_distance` ("spacing"), and, if
+    `link_quality` is given (see `load_link_quality()`), the mean quality of
+    its links ("link_quality"). All of them range from 0 to 1 and are summed
+    up to the "score" of the network, weighted by SCORE_WEIGHTS.
+    """
+    hops = nx.single_source_shortest_path_length(network.network,
+                                                 network.sink)
+    sources = np.array([h for h in hops.values() if h > 0])
+    if len(sources) == 0:
+        return {"score": 0.0}
+    p = np.bincount(sources) / len(sources)
+    p = p[p > 0]
+    res = {"hops": min(-(p * np.log(p)).sum() / math.log(SCORE_DEPTH), 1.0)}
+    res["fanout"] = _fanout_balance(
+        sum(1 for m in network.network.neighbors(n) if hops[m] > hops[n])
+        for n in network.network if n != network.sink
+    )
+    info = [network.network.nodes[n]["info"] for n in network.network]
+    distances = _pairwise_distances(np.array([(n.x, n.y, n.z) for n in info]))
+    np.fill_diagonal(distances, np.inf)
+    res["spacing"] = min(np.median(distances.min(axis=1)) / max_distance,
+                         1.0)
+    if link_quality is not None:
+        res["link_quality"] = np.mean([
+            link_quality.get_edge_data(a, b, {}).get("quality", 0)
+            for a, b in network.network.edges()
+        ])
+    res = {k: float(v) for k, v in res.items()}
+    res["score"] = sum(SCORE_WEIGHTS[k] * v for k, v in res.items())
+    return res
+
+
+def inventory_name(iotlab_site):
+    return os.path.join(DATA_PATH, "{}.inventory.json".format(iotlab_site))
+
+
+def fetch_inventory(iotlab_site, api=None):
+    """
+    Fetches the nodes of `iotlab_site` (with their position, architecture,
+    and state) from the IoT-LAB API and caches them in
+    `inventory_name(iotlab_site)`.
+    """
+    if api is None:
+        api = get_default_api()
+    inventory = {"site": iotlab_site, "timestamp": time.time(),
+                 "nodes": api.get_nodes(site=iotlab_site)["items"]}
+    filename = inventory_name(iotlab_site)
+    with open(filename + ".tmp", "w") as inventory_file:
+        json.dump(inventory, inventory_file, indent=1)
+    os.replace(filename + ".tmp", filename)
+    return inventory
+
+
+def load_inventory(iotlab_site, ttl=INVENTORY_TTL, offline=False, api=None):
+    """
+    Returns the cached inventory of `iotlab_site` or fetches it again if it
+    does not exist or is older than `ttl` seconds. If `offline` is True, the
+    cached inventory is used regardless of its age.
+    """
+    try:
+        with open(inventory_name(iotlab_site)) as inventory_file:
+            inventory = json.load(inventory_file)
+    except FileNotFoundError:
+        if offline:
+            raise NetworkConstructionError(
+                "No inventory of site {} cached in {}".format(iotlab_site,
+                                                              DATA_PATH)
+            )
+        inventory = None
+    if offline:
+        logging.info("Using inventory of site {} from {}".format(
+            iotlab_site, time.ctime(inventory["timestamp"])
+        ))
+    elif inventory is None or (time.time() - inventory["timestamp"]) > ttl:
+        logging.info("Fetching inventory of site {}".format(iotlab_site))
+        inventory = fetch_inventory(iotlab_site, api)
+    return inventory
+
+
 def _node_num(node):
-    res = node.uri.split(".")[0]
+    res = getattr(node, "uri", node).split(".")[0]
     return int(res.split("-")[-1])
 
 
+def _bfs(sink, neighbor_candidates, add_neighbor, rng, min_neighbors,
+         max_neighbors, max_nodes):
+    """
+    Grows a network breadth-first from `sink`: each node reached gets a
+    random sample of its `neighbor_candidates(node)` as neighbors (two for
+    the sink, `min_neighbors` to `max_neighbors` for the other nodes), which
+    are added with `add_neighbor(node, neigh)` until the network has
+    `max_nodes` nodes.
+    """
+    queue = collections.deque([sink])
+    size = 1
+    while queue and size < max_nodes:
+        node = queue.popleft()
+        candidates = neighbor_candidates(node)
+        if not candidates:
+            continue
+        if node == sink:
+            # sink always has two neighbors
+            num_neigh = min(2, len(candidates))
+        else:
+            num_neigh = rng.randint(
+                min(min_neighbors, len(candidates)),
+                min(max_neighbors, len(candidates))
+            )
+        for neigh in rng.sample(candidates, num_neigh):
+            add_neighbor(node, neigh)
+            size += 1
+            if size == max_nodes:
+                break
+            queue.append(neigh)
+
+
 def construct_network(sink, iotlab_site=DEFAULT_IOTLAB_SITE,
                       min_distance=MIN_DISTANCE, max_distance=MAX_DISTANCE,
                       min_neighbors=MIN_NEIGHBORS, max_neighbors=MAX_NEIGHBORS,
-                      max_nodes=MAX_NODES, api=None):
-    def _restrict_potential_neighbors(node_set, node, network):
-        potential_neighbors = set(n for n in node_set.values()
-                                  if _node_num(n) not in
-                                  NODE_BLACKLIST[iotlab_site])
-        potential_neighbors.remove(node)
+                      max_nodes=MAX_NODES, api=None, save=True,
+                      rng=random):
+    def _restrict_potential_neighbors(node):
         # select nodes where
-        # neigh is is within max_distance of node and
-        # neigh is not already in network
-        # neigh is further away than min_distance from all other nodes and
-        # and there is no node in network that is within min_distance of neigh
+        # neigh is within max_distance of node and not in network and
+        # there is no node in network that is within min_distance of neigh
         return [
-            neigh for neigh in potential_neighbors if
-            (node.distance(neigh) < max_distance) and
-            (neigh not in network) and
-            ((neigh.distance(w) >= min_distance)
-             for w in potential_neighbors - {neigh}) and
-            not any((neigh.distance(x) < min_distance) for x in network)
+            neigh for neigh in potential_neighbors.within(
+                node_selection[node.uri], max_distance
+            )
+            if neigh not in visited and
+            not network_nodes.within(neigh, min_distance)
         ]
 
+    def _add_neighbor(node, neigh):
+        result.add_edge(node, neigh)
+        network_nodes.add(neigh)
+        visited.add(neigh)
+
     if sink in NODE_BLACKLIST[iotlab_site]:
         logging.warning("Sink {} in blacklist for site {}".format(sink,
                                                                   iotlab_site))
@@ -122,54 +383,159 @@ def construct_network(sink, iotlab_site=DEFAULT_IOTLAB_SITE,
     if get_uri(iotlab_site, sink) not in node_selection:
         raise NetworkConstructionError("Sink {} is not 'Alive' (maybe booked "
                                        "by other experiment?)".format(sink))
-    result = SinkNetworkedNodes(iotlab_site, sink)
+    result = SinkNetworkedNodes(iotlab_site, sink, api=api)
     sink = result[sink]
-    # BFS from sink
-    queue = Queue()
+    # cells are as large as the distance queried for, so a query only needs
+    # to look at the cells surrounding the node
+    potential_neighbors = _NodeGrid(max_distance, (
+        n for n in node_selection.nodes.values()
+        if n.x is not None and
+        _node_num(n) not in NODE_BLACKLIST[iotlab_site]
+    ))
+    network_nodes = _NodeGrid(min_distance or max_distance, [sink])
     visited = set([sink])
-    queue.put(sink)
-
-    def _save_result():
-        draw_network(result, False, with_labels=True)
-        plt.savefig(os.path.join(DATA_PATH, "{}_logic.svg".format(result)),
-                    dpi=150)
-        plt.clf()
-        draw_network(result, True, with_labels=True)
-        plt.savefig(os.path.join(DATA_PATH, "{}_geo.svg".format(result)),
-                    dpi=150)
-        result.save_edgelist(
-            os.path.join(DATA_PATH, "{}.edgelist.gz".format(result))
-        )
-        plt.clf()
-
-    while not queue.empty() and len(result) < max_nodes:
-        node = queue.get()
-        candidates = _restrict_potential_neighbors(
-            node_selection.nodes, node_selection[node.uri], result
-        )
-        if not candidates:
-            continue
-        if node == sink:
-            # sink always has two neighbors
-            num_neigh = 2
-        else:
-            num_neigh = random.randint(
-                min(min_neighbors, len(candidates)),
-                min(max_neighbors, len(candidates))
-            )
-        neighbor_sample = random.sample(candidates, num_neigh)
-        for neigh in neighbor_sample:
-            if neigh not in visited:
-                result.add_edge(node, neigh)
-                if len(result) == max_nodes:
-                    _save_result()
-                    return result
-                visited.add(neigh)
-                queue.put(neigh)
-    _save_result()
+    _bfs(sink, _restrict_potential_neighbors, _add_neighbor, rng,
+         min_neighbors, max_neighbors, max_nodes)
+    if save:
+        save_network(result)
     return result
 
 
+def _init_batch_worker(batch_args, link_quality):
+    global _BATCH_ARGS, _BATCH_LINK_QUALITY
+
+    _BATCH_ARGS = batch_args
+    _BATCH_LINK_QUALITY = link_quality
+
+
+def _batch_worker(seed):
+    network = construct_network(save=False, rng=random.Random(seed),
+                                **_BATCH_ARGS)
+    return seed, str(network), score_network(
+        network, _BATCH_LINK_QUALITY,
+        _BATCH_ARGS.get("max_distance", MAX_DISTANCE)
+    )
+
+
+def construct_networks(sink, count, top=TOP_NETWORKS, seed=0, jobs=1,
+                       link_quality=None, **kwargs):
+    """
+    Constructs `count` networks with `construct_network()` in `jobs`
+    processes (0 for one per CPU), scores them with `score_network()`, and
+    saves the `top` best of them. The networks are constructed with the
+    seeds `seed` to `seed + count - 1`, so a network can be constructed
+    again from its seed.
+
+    Returns the seeds, names, and scores of the best networks.
+    """
+    kwargs["sink"] = sink
+    with multiprocessing.Pool(jobs or None, initializer=_init_batch_worker,
+                              initargs=(kwargs, link_quality)) as pool:
+        candidates = pool.map(_batch_worker, range(seed, seed + count))
+    best = {}
+    for candidate in candidates:
+        # the same network may be constructed from multiple seeds
+        best.setdefault(candidate[1], candidate)
+    best = sorted(best.values(), key=lambda c: (-c[2]["score"], c[0]))[:top]
+    for rank, (candidate_seed, name, scores) in enumerate(best, 1):
+        logging.info("{}. {} (seed {}): {}".format(
+            rank, name, candidate_seed,
+            ", ".join("{} {:.3f}".format(k, v) for k, v in scores.items())
+        ))
+        save_network(construct_network(save=False,
+                                       rng=random.Random(candidate_seed),
+                                       **kwargs))
+    return best
+
+
+def _construct_hops(distances, sink, rng, min_distance=MIN_DISTANCE,
+                    max_distance=MAX_DISTANCE, min_neighbors=MIN_NEIGHBORS,
+                    max_neighbors=MAX_NEIGHBORS, max_nodes=MAX_NODES):
+    """
+    Constructs a network like `construct_network()` on the pairwise
+    `distances` of the nodes of a site, with the node with index `sink` as
+    sink. Returns the hop count of each node to the sink (-1 for nodes not
+    in the network) and the number of down-stream neighbors of each node.
+    """
+    hops = np.full(len(distances), -1)
+    fanout = np.zeros(len(distances), dtype=int)
+    hops[sink] = 0
+    # nodes within min_distance of a node in the network
+    blocked = distances[sink] < min_distance
+
+    def _candidates(node):
+        return np.flatnonzero((distances[node] < max_distance) &
+                              ~blocked & (hops < 0)).tolist()
+
+    def _add_neighbor(node, neigh):
+        hops[neigh] = hops[node] + 1
+        fanout[node] += 1
+        blocked[:] |= distances[neigh] < min_distance
+
+    _bfs(sink, _candidates, _add_neighbor, rng, min_neighbors,
+         max_neighbors, max_nodes)
+    return hops, fanout
+
+
+def _init_rank_worker(distances, rank_args):
+    global _RANK_DISTANCES, _RANK_ARGS
+
+    _RANK_DISTANCES = distances
+    _RANK_ARGS = rank_args
+
+
+def _rank_worker(args):
+    sink, seed, runs = args
+    depth = []
+    balance = []
+    size = []
+    for run in range(runs):
+        hops, fanout = _construct_hops(_RANK_DISTANCES, sink,
+                                       random.Random(seed + run),
+                                       **_RANK_ARGS)
+        depth.append(hops.max())
+        balance.append(_fanout_balance(np.delete(fanout, sink)))
+        size.append(np.count_nonzero(hops >= 0))
+    return (sink, float(np.mean(depth)), float(np.mean(balance)),
+            float(np.mean(size)))
+
+
+def rank_sinks(iotlab_site=DEFAULT_IOTLAB_SITE, runs=RANK_RUNS, seed=0,
+               jobs=1, api=None, **kwargs):
+    """
+    Constructs `runs` networks (with the seeds `seed` to `seed + runs - 1`)
+    for every alive node of `iotlab_site` not in NODE_BLACKLIST as a sink,
+    in `jobs` processes (0 for one per CPU). `kwargs` are the construction
+    parameters of `construct_network()`.
+
+    Returns the number, mean depth (maximum hop count), mean balance of the
+    number of down-stream neighbors per forwarder (see `score_network()`),
+    and mean number of nodes of the networks of each sink, the deepest and
+    most balanced first.
+    """
+    if api is None:
+        api = get_default_api()
+    nodes = [
+        n for n in api.get_nodes(site=iotlab_site, archi=ARCHI_FULL,
+                                 state="Alive")["items"]
+        if n["x"].strip() != "" and
+        _node_num(n["network_address"]) not in NODE_BLACKLIST[iotlab_site]
+    ]
+    nums = [_node_num(n["network_address"]) for n in nodes]
+    # the distances of all nodes are computed at once and shared by the
+    # constructions for all sinks
+    distances = _pairwise_distances(np.array(
+        [(n["x"], n["y"], n["z"]) for n in nodes], dtype=float
+    ))
+    with multiprocessing.Pool(jobs or None, initializer=_init_rank_worker,
+                              initargs=(distances, kwargs)) as pool:
+        res = pool.map(_rank_worker,
+                       [(sink, seed, runs) for sink in range(len(nodes))])
+    res = [(nums[sink], depth, balance, size)
+           for sink, depth, balance, size in res]
+    return sorted(res, key=lambda r: (-r[1], -r[2], r[0]))
+
+
 def main():
     logging.basicConfig(format='%(asctime)s:%(levelname)s: %(message)s',
                         level=logging.INFO)
@@ -192,13 +558,86 @@ def main():
     parser.add_argument("-N", "--max-nodes", default=MAX_NODES,
                         help="Maximum number of nodes in network",
                         type=int)
-    parser.add_argument("sink", type=int,
+    parser.add_argument("-t", "--inventory-ttl", default=INVENTORY_TTL,
+                        help="Maximum age in seconds of the cached node "
+                        "inventory of the site (default: {})"
+                        .format(INVENTORY_TTL), type=float)
+    parser.add_argument("-o", "--offline", action="store_true",
+                        help="Use the cached node inventory of the site "
+                        "regardless of its age")
+    parser.add_argument("-b", "--batch", default=None, type=int,
+                        help="Construct this many networks and only keep "
+                        "the best of them (see --top). With --rank-sinks: "
+                        "networks per sink (default: {})".format(RANK_RUNS))
+    parser.add_argument("-k", "--top", default=TOP_NETWORKS, type=int,
+                        help="Number of networks to keep with --batch or "
+                        "of sinks to report with --rank-sinks "
+                        "(default: {})".format(TOP_NETWORKS))
+    parser.add_argument("-j", "--jobs", default=1, type=int,
+                        help="Number of networks to construct in parallel "
+                        "with --batch or --rank-sinks, 0 for one per CPU "
+                        "(default: 1)")
+    parser.add_argument("-r", "--rank-sinks", action="store_true",
+                        help="Rank all nodes of the site as sinks by the "
+                        "depth and balance of the networks constructed for "
+                        "them instead of constructing a network")
+    parser.add_argument("-s", "--seed", default=None, type=int,
+                        help="Seed for the random construction (with "
+                        "--batch: of the first network, default: random)")
+    parser.add_argument("-q", "--link-quality", default=None,
+                        help="Edge-list with measured qualities (0 to 1) of "
+                        "links between nodes to score networks with")
+    parser.add_argument("sink", type=int, nargs="?",
                         help="Number of the M3 sink node within the network")
     args = parser.parse_args()
-    construct_network(args.sink, args.iotlab_site,
-                      args.min_distance, args.max_distance,
-                      args.min_neighbors, args.max_neighbors,
-                      args.max_nodes)
+    if args.sink is None and not args.rank_sinks:
+        parser.error("the following arguments are required: sink")
+    inventory = load_inventory(args.iotlab_site, args.inventory_ttl,
+                               args.offline)
+    if args.seed is None:
+        args.seed = random.randrange(2 ** 32)
+    logging.info("Using seed {}".format(args.seed))
+    if args.rank_sinks:
+        sinks = rank_sinks(args.iotlab_site, args.batch or RANK_RUNS,
+                           args.seed, args.jobs, InventoryApi(inventory),
+                           min_distance=args.min_distance,
+                           max_distance=args.max_distance,
+                           min_neighbors=args.min_neighbors,
+                           max_neighbors=args.max_neighbors,
+                           max_nodes=args.max_nodes)
+        filename = os.path.join(DATA_PATH,
+                                "{}.sinks.csv".format(args.iotlab_site))
+        with open(filename, "w") as sinks_file:
+            writer = csv.writer(sinks_file)
+            writer.writerow(["sink", "depth", "balance", "nodes"])
+            writer.writerows(sinks)
+        for rank, (sink, depth, balance, size) in \
+                enumerate(sinks[:args.top], 1):
+            logging.info("{}. m3-{}: depth {:.1f}, balance {:.3f}, "
+                         "nodes {:.1f}".format(rank, sink, depth, balance,
+                                               size))
+        logging.info("Ranking of all {} sinks written to {}"
+                     .format(len(sinks), filename))
+    elif args.batch is None:
+        construct_network(args.sink, args.iotlab_site,
+                          args.min_distance, args.max_distance,
+                          args.min_neighbors, args.max_neighbors,
+                          args.max_nodes, api=InventoryApi(inventory),
+                          rng=random.Random(args.seed))
+    else:
+        if args.link_quality is None:
+            link_quality = None
+        else:
+            link_quality = load_link_quality(args.link_quality)
+        construct_networks(args.sink, args.batch, args.top, args.seed,
+                           args.jobs, link_quality,
+                           iotlab_site=args.iotlab_site,
+                           min_distance=args.min_distance,
+                           max_distance=args.max_distance,
+                           min_neighbors=args.min_neighbors,
+                           max_neighbors=args.max_neighbors,
+                           max_nodes=args.max_nodes,
+                           api=InventoryApi(inventory))
 
 
 if __name__ == "__main__":
@@ -18,6 +18,7 @@ import pexpect
 import pprint
 import random
 import signal
+import subprocess
 import sys
 import time
 import urllib.error
@@ -41,6 +42,7 @@ __email__ = "m.lenders@fu-berlin.de"
 
 SCRIPT_PATH = os.path.dirname(os.path.realpath(__file__))
 APPS_PATH = os.path.join(SCRIPT_PATH, "..", "..", "apps")
+PARSE_RESULTS = os.path.join(SCRIPT_PATH, "..", "plots", "parse_results.py")
 
 DATA_PATH = os.environ.get("DATA_PATH",
                            os.path.join(SCRIPT_PATH, "..", "..", "results"))
@@ -73,7 +75,7 @@ DEFAULT_DURATION = 60
 
 
 def run_experiment(exp, mode, data_len, count, delay, sniff=False,
-                   run_duration=None):
+                   run_duration=None, follow=False):
     sources = [n for n in exp.nodes.non_sink_nodes
                if n not in exp.nodes.neighbors(exp.nodes.sink)]
     run_name = os.path.join(
@@ -97,6 +99,12 @@ def run_experiment(exp, mode, data_len, count, delay, sniff=False,
     _load_lladdr_ifaces(exp)
     exp.start_serial_aggregator(exp.nodes.site,
                                 logname="{}.log".format(run_name))
+    if follow:
+        # convert log while it is written, the converter stops once this
+        # process exited
+        subprocess.Popen([sys.executable, PARSE_RESULTS,
+                          "--follow", "{}.log".format(run_name),
+                          "--pid", str(os.getpid())])
     logging.info("Constructing routes")
     sink_addr = _construct_routes(exp)
     exp.cmd("ifconfig", wait_after=3)
@@ -279,7 +287,7 @@ def start_experiment(network, name=None, duration=DEFAULT_DURATION,
                      tmux_target=None, mode=DEFAULT_MODE,
                      data_len=DEFAULT_DATA_LEN, count=DEFAULT_COUNT,
                      delay=DEFAULT_DELAY, run_duration=None, sniff=False,
-                     api=None):
+                     follow=False, api=None):
     if name is None:
         name = DEFAULT_EXP_NAME_FORMAT.format(network=network, channel=channel)
     if api is None:
@@ -309,7 +317,8 @@ def start_experiment(network, name=None, duration=DEFAULT_DURATION,
                              (len(network) - 1) * [source_firmware],
                              exp_id, profiles, mode=mode, count=count,
                              data_len=data_len, delay=delay, sniff=sniff,
-                             run_duration=run_duration, api=api)
+                             run_duration=run_duration, follow=follow,
+                             api=api)
     except ExperimentError as e:
         if os.path.exists(RUNNING_EXPERIMENT_FILE):
             os.remove(RUNNING_EXPERIMENT_FILE)
@@ -421,6 +430,9 @@ def main():
                         help="Duration of a single run in the experiment in "
                         "seconds (default: calculated from --delay and "
                         "--count)")
+    parser.add_argument("--follow", action="store_true",
+                        help="Convert the log to CSVs with parse_results.py "
+                             "while the run is conducted")
     parser.add_argument("sink", type=int,
                         help="Number of the M3 sink node within the network")
     parser.add_argument("mode", default=DEFAULT_MODE, choices=MODES, nargs="?",
@@ -441,7 +453,7 @@ def main():
                      tmux_target=args.tmux_target, mode=args.mode,
                      data_len=args.data_len, count=args.count,
                      delay=args.delay, run_duration=args.run_duration,
-                     sniff=args.sniff, api=api)
+                     sniff=args.sniff, follow=args.follow, api=api)
 
 
 if __name__ == "__main__":
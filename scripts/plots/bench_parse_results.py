@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2019 Freie Universität Berlin
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+import argparse
+import logging
+import multiprocessing
+import re
+import resource
+import tempfile
+import time
+
+import parse_results
+import synthetic_log
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2019 Freie Universität Berlin"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+DEFAULT_NODES = 50
+DEFAULT_COUNT = 100
+DEFAULT_REPEAT = 3
+# stages of log_to_csvs() timed separately, as (name, object, attribute)
+STAGES = [
+    ("topology", parse_results, "network_topology"),
+    ("address index", parse_results, "_addr_index"),
+    ("parse log", parse_results, "_parse_log"),
+    ("_write_csvs", parse_results, "_write_csvs"),
+    ("finish .npy", parse_results._ColumnarWriter, "finish"),
+]
+
+
+def _classify_sequential(loglines):
+    # the way log_to_csvs classified lines before LOG_LINE_PATTERN
+    c_data = re.compile(parse_results.LOG_DATA_PATTERN)
+    c_stats = [re.compile(p) for p in [
+        parse_results.LOG_RETRANS_PATTERN,
+        parse_results.LOG_PKTBUF_SIZE_PATTERN,
+        parse_results.LOG_PKTBUF_USAGE_PATTERN,
+        parse_results.LOG_RBUF_PATTERN,
+        parse_results.LOG_VRB_PATTERN,
+    ]]
+    matched = 0
+    for line in loglines:
+        line = line.decode(errors="ignore")
+        if c_data.match(line) is not None:
+            matched += 1
+            continue
+        for c in c_stats:
+            if c.search(line) is not None:
+                matched += 1
+                break
+    return matched
+
+
+def _classify_combined(loglines):
+    c_line = re.compile(parse_results.LOG_LINE_PATTERN)
+    matched = 0
+    for line in loglines:
+        if c_line.match(line) is not None:
+            matched += 1
+    return matched
+
+
+def _best_of(repeat, func, *args, **kwargs):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        duration = time.perf_counter() - start
+        if best is None or duration < best:
+            best = duration
+    return best
+
+
+def _timed(stages, name, func):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stages[name] = stages.get(name, 0) + time.perf_counter() - start
+    return wrapper
+
+
+def _max_rss():
+    # in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _profile_log_to_csvs(args):
+    # runs in a fresh process, so the peak RSS is the conversion's and the
+    # caches in parse_results are empty
+    logname, kwargs = args
+    stages = {}
+    for name, obj, attr in STAGES:
+        setattr(obj, attr, _timed(stages, name, getattr(obj, attr)))
+    rss_before = _max_rss()
+    start = time.perf_counter()
+    parse_results.log_to_csvs(logname, **kwargs)
+    duration = time.perf_counter() - start
+    return duration, stages, rss_before, _max_rss()
+
+
+def _profile(repeat, logname, **kwargs):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        return min(pool.map(_profile_log_to_csvs,
+                            repeat * [(logname, kwargs)]),
+                   key=lambda res: res[0])
+
+
+def benchmark(nodes=DEFAULT_NODES, count=DEFAULT_COUNT,
+              repeat=DEFAULT_REPEAT, loss=synthetic_log.DEFAULT_LOSS,
+              edgelist=None, mode=synthetic_log.DEFAULT_MODE,
+              data_len=synthetic_log.DEFAULT_DATA_LEN, stream=False):
+    with tempfile.TemporaryDirectory() as data_path:
+        logname, lines = synthetic_log.generate_log(
+            data_path, edgelist, nodes, count, data_len, mode, loss=loss,
+            seed=nodes * count
+        )
+        match = re.search(parse_results.LOG_NAME_PATTERN, logname)
+        kwargs = parse_results.match_to_dict(match)
+        with open(logname, "rb") as logfile:
+            loglines = logfile.readlines()
+        assert _classify_sequential(loglines) == \
+            _classify_combined(loglines)
+        results = [
+            ("classify (sequential patterns)",
+             _best_of(repeat, _classify_sequential, loglines)),
+            ("classify (combined pattern)",
+             _best_of(repeat, _classify_combined, loglines)),
+        ]
+        duration, stages, rss_before, rss_after = _profile(
+            repeat, logname, data_path=data_path, stream=stream, **kwargs
+        )
+        results.append(("log_to_csvs", duration))
+    print("{} lines ({} network, {} packets per source, {} loss per hop)"
+          .format(lines, kwargs["network"], count, loss))
+    for name, duration in results:
+        print("{:<32} {:>10.0f} lines/s".format(name, lines / duration))
+    print("log_to_csvs stages{}:".format(" (streaming)" if stream else ""))
+    for name, _, _ in STAGES:
+        print("  {:<30} {:>10.3f} s".format(name, stages.get(name, 0)))
+    print("  {:<30} {:>10.3f} s".format(
+        "other", duration - sum(stages.values())
+    ))
+    print("peak RSS {:.1f} MiB ({:+.1f} MiB during log_to_csvs)"
+          .format(rss_after / 2**20, (rss_after - rss_before) / 2**20))
+    return results, stages, rss_after
+
+
+def main():
+    logging.basicConfig(format='%(levelname)s: %(message)s',
+                        level=logging.WARNING)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--nodes", default=DEFAULT_NODES, type=int,
+                        help="Number of nodes in the synthetic network "
+                             "(default: {})".format(DEFAULT_NODES))
+    parser.add_argument("-c", "--count", default=DEFAULT_COUNT, type=int,
+                        help="Number of packets per source "
+                             "(default: {})".format(DEFAULT_COUNT))
+    parser.add_argument("-r", "--repeat", default=DEFAULT_REPEAT, type=int,
+                        help="Number of repetitions per measurement, the "
+                             "best one is reported (default: {})"
+                             .format(DEFAULT_REPEAT))
+    parser.add_argument("-L", "--loss", default=synthetic_log.DEFAULT_LOSS,
+                        type=float,
+                        help="Probability of a packet being lost per hop "
+                             "(default: {})"
+                             .format(synthetic_log.DEFAULT_LOSS))
+    parser.add_argument("-f", "--edgelist-file", default=None,
+                        help="NetworkX edge-list of the network (default: a "
+                             "random tree of --nodes nodes)")
+    parser.add_argument("-l", "--data-len",
+                        default=synthetic_log.DEFAULT_DATA_LEN, type=int,
+                        help="Payload size of the packets (default: {})"
+                             .format(synthetic_log.DEFAULT_DATA_LEN))
+    parser.add_argument("-m", "--mode", default=synthetic_log.DEFAULT_MODE,
+                        choices=synthetic_log.MODES,
+                        help="Experiment mode (default: {})"
+                             .format(synthetic_log.DEFAULT_MODE))
+    parser.add_argument("-s", "--stream", action="store_true",
+                        help="Convert the log in streaming mode")
+    args = parser.parse_args()
+    benchmark(args.nodes, args.count, args.repeat, args.loss,
+              args.edgelist_file, args.mode, args.data_len, args.stream)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,33 @@
 # General Public License v2.1. See the file LICENSE in the top level
 # directory for more details.
 
+import argparse
+import array
+import collections
 import csv
+import gzip
+import hashlib
+import io
+import json
 import logging
+import logging.handlers
+import multiprocessing
 import networkx as nx
+import numpy as np
 import re
 import os
+import pickle
+import signal
+import sqlite3
+import struct
+import time
+
+from quantile_sketch import QuantileSketch
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 __author__ = "Martine S. Lenders"
 __copyright__ = "Copyright 2019 Freie Universität Berlin"
@@ -26,11 +48,19 @@ GLOBAL_PREFIX = os.environ.get("GLOBAL_PREFIX", "2001:db8:0:1:")
 NAME_PATTERN = r"lcn19_" \
                r"n(?P<network>m3-\d+x[0-9a-f]+)_c\d+__" \
                r"m{mode}_r{data_len}Bx\d+x{delay}ms_(?P<timestamp>\d+)"
-LOG_NAME_PATTERN = r"{}\.log".format(NAME_PATTERN.format(
+# logs and CSVs may be compressed with one of these
+COMPRESSIONS = ["gz", "zst"]
+COMPRESSION_PATTERN = r"(?:\.(?:{}))?".format("|".join(COMPRESSIONS))
+LOG_NAME_PATTERN = r"{}\.log{}$".format(NAME_PATTERN.format(
     mode=r"(?P<mode>(reass|fwd))",
     data_len=r"(?P<data_len>\d+)",
     delay=r"\d+"
-))
+), COMPRESSION_PATTERN)
+
+RUN_NAME_PATTERN = r"lcn19_n(?P<network>m3-\d+x[0-9a-f]+)" \
+                   r"_c(?P<channel>\d+)__" \
+                   r"m(?P<mode>reass|fwd)_r(?P<data_len>\d+)B" \
+                   r"x(?P<count>\d+)x(?P<delay>\d+)ms_(?P<timestamp>\d+)"
 
 LOG_EXP_STARTED_PATTERN = r"starting experiment"
 LOG_DATA_PATTERN = r"(?P<time>\d+.\d+);(?P<node>m3-\d+);" \
@@ -46,92 +76,863 @@ LOG_PKTBUF_USAGE_PATTERN = r"(?P<node>m3-\d+);  position of last byte " \
                            r"used: (?P<pktbuf_usage>\d+)"
 LOG_RBUF_PATTERN = r"(?P<node>m3-\d+);rbuf full: (?P<rbuf_full>\d+)"
 LOG_VRB_PATTERN = r"(?P<node>m3-\d+);VRB full: (?P<vrb_full>\d+)"
+# all of the above patterns combined into one to classify a raw log line in a
+# single pass, the name of the last matched group identifies the line type
+LOG_LINE_PATTERN = rb"(?P<time>\d+.\d+);(?P<node>m3-\d+);(?:" \
+                   rb"(?P<data>(> ?)?(?P<dir>in|out|err);" \
+                   rb"(?P<pkt_id>[0-9a-f]+)" \
+                   rb"(;(?P<addr>[0-9a-f:]+);\d+|(?P<errno>\d+))?)|" \
+                   rb"\s+TX succeeded \d+ errors \d+ " \
+                   rb"retransmissions (?P<l2_retrans>\d+)|" \
+                   rb"packet buffer: " \
+                   rb"first byte: 0x[0-9a-f]+, last byte: 0x[0-9a-f]+ " \
+                   rb"\(size: (?P<pktbuf_size>\d+)\)|" \
+                   rb"  position of last byte used: (?P<pktbuf_usage>\d+)|" \
+                   rb"rbuf full: (?P<rbuf_full>\d+)|" \
+                   rb"VRB full: (?P<vrb_full>\d+))"
 
 LINK_LOCAL_PREFIX = "fe80::"
+# time in seconds after which a packet is considered lost in streaming mode
+DEFAULT_LOSS_HORIZON = 120
+DEFAULT_FOLLOW_INTERVAL = 5
+DEFAULT_IDLE_TIMEOUT = 300
+# maximum number of bytes parsed at once when following a log
+FOLLOW_CHUNK_SIZE = 1 << 24
+# the source application prints the packet IDs with 16 bits
+PKT_ID_RANGE = 1 << 16
+# typed columns of the .times.npy and .stats.npy files written alongside the
+# CSVs, missing integer values are stored as MISSING, missing floats as NaN
+TIMES_DTYPE = np.dtype([
+    ("src", "i4"), ("hops_to_sink", "i4"), ("pkt_id", "i8"),
+    ("send_time", "f8"), ("recv_time", "f8"), ("send_errno", "i4"),
+    ("duplicates", "i4"), ("ambiguous", "i4"),
+])
+STATS_DTYPE = np.dtype([
+    ("node", "i4"), ("hops_to_sink", "i4"), ("successors", "i4"),
+    ("subtree_size", "i4"), ("l2_retrans", "i8"), ("pktbuf_usage", "i8"),
+    ("pktbuf_size", "i8"), ("rbuf_full", "i8"), ("vrb_full", "i8"),
+])
+MISSING = -1
+# number of rows collected before they are appended to a .npy file
+NPY_CHUNK_ROWS = 1 << 16
+# increment when the output of log_to_csvs() changes, so incremental
+# conversions redo all logs
+PARSER_VERSION = 4
+MANIFEST_NAME = "parse_results.manifest.json"
+RESULTS_DB_NAME = "results.sqlite"
+RESULTS_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    log_sha1 TEXT NOT NULL,
+    parser_version INTEGER NOT NULL,
+    network TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    data_len INTEGER NOT NULL,
+    delay INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_config ON runs (mode, data_len, timestamp);
+CREATE TABLE IF NOT EXISTS packets (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    src INTEGER NOT NULL,
+    hops_to_sink INTEGER,
+    pkt_id INTEGER NOT NULL,
+    send_time REAL,
+    recv_time REAL,
+    send_errno INTEGER,
+    duplicates INTEGER,
+    ambiguous INTEGER
+);
+CREATE INDEX IF NOT EXISTS packets_hops ON packets (run_id, hops_to_sink);
+CREATE TABLE IF NOT EXISTS node_stats (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    node INTEGER NOT NULL,
+    hops_to_sink INTEGER,
+    successors INTEGER,
+    subtree_size INTEGER,
+    l2_retrans INTEGER,
+    pktbuf_usage INTEGER,
+    pktbuf_size INTEGER,
+    rbuf_full INTEGER,
+    vrb_full INTEGER
+);
+CREATE INDEX IF NOT EXISTS node_stats_hops
+    ON node_stats (run_id, hops_to_sink);
+"""
+TOPOLOGY_FIELDNAMES = ["node", "hops_to_sink", "successors", "subtree_size"]
+
+# data derived from input files (address indexes, network topologies,
+# hashes), keyed by the kind of data and the file name, see _load_cached()
+_FILE_CACHE = {}
+# collects the log records of a conversion in a worker process, see
+# _init_worker()
+_worker_log_handler = None
 
 
 class LogError(Exception):
     pass
 
 
-def times_csvname(logname):
+def open_file(filename, mode="r"):
     """
-    >>> time_csvname("test.log")
-    'test.csv'
+    Opens `filename` like `open()`, but (de-)compresses files ending with one
+    of the COMPRESSIONS transparently.
     """
-    csvname = "{}times.csv".format(logname[:-3])
+    if filename.endswith(".gz"):
+        if "b" not in mode:
+            mode += "t"
+        return gzip.open(filename, mode)
+    elif filename.endswith(".zst"):
+        if zstandard is None:
+            raise LogError("Python package zstandard is required to open {}"
+                           .format(filename))
+        if mode == "rb":
+            # the decompression reader can not be iterated line by line
+            return io.BufferedReader(zstandard.open(filename, mode))
+        return zstandard.open(filename, mode)
+    else:
+        return open(filename, mode)
+
+
+def _log_basename(logname):
+    for compression in COMPRESSIONS:
+        ext = ".{}".format(compression)
+        if logname.endswith(ext):
+            logname = logname[:-len(ext)]
+            break
+    return logname[:-len(".log")]
+
+
+def _csvname(logname, kind, compression=None):
+    csvname = "{}.{}.csv".format(_log_basename(logname), kind)
+    if compression:
+        csvname += ".{}".format(compression)
     return csvname
 
 
-def stats_csvname(logname):
+def times_csvname(logname, compression=None):
     """
-    >>> time_csvname("test.log")
-    'test.csv'
+    >>> times_csvname("test.log")
+    'test.times.csv'
+    >>> times_csvname("test.log.zst", "gz")
+    'test.times.csv.gz'
     """
-    csvname = "{}stats.csv".format(logname[:-3])
-    return csvname
+    return _csvname(logname, "times", compression)
+
+
+def stats_csvname(logname, compression=None):
+    """
+    >>> stats_csvname("test.log")
+    'test.stats.csv'
+    >>> stats_csvname("test.log.zst", "gz")
+    'test.stats.csv.gz'
+    """
+    return _csvname(logname, "stats", compression)
+
+
+def _npyname(csvname):
+    """
+    >>> _npyname("test.times.csv.gz")
+    'test.times.npy'
+    """
+    for compression in COMPRESSIONS:
+        ext = ".{}".format(compression)
+        if csvname.endswith(ext):
+            csvname = csvname[:-len(ext)]
+            break
+    return "{}.npy".format(csvname[:-len(".csv")])
+
+
+def summary_name(logname):
+    """
+    >>> summary_name("test.log.gz")
+    'test.summary.json'
+    """
+    return "{}.summary.json".format(_log_basename(logname))
+
+
+def _all_outputs(logname):
+    for compression in [None] + COMPRESSIONS:
+        yield times_csvname(logname, compression)
+        yield stats_csvname(logname, compression)
+    yield _npyname(times_csvname(logname))
+    yield _npyname(stats_csvname(logname))
+    yield summary_name(logname)
+
+
+def _remove_files(filenames):
+    for filename in filenames:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+
+def node_num(node):
+    """
+    >>> node_num("m3-55")
+    55
+    """
+    return int(node.split("-")[-1])
+
+
+def _column_value(value, dtype):
+    if value is None or value == "":
+        return np.nan if dtype.kind == "f" else MISSING
+    elif isinstance(value, str):
+        if value.startswith("m3-"):
+            return node_num(value)
+        return float(value) if dtype.kind == "f" else int(value)
+    return value
+
+
+class _ColumnStore(object):
+    """
+    Collects rows (as dictionaries) in compact typed columns according to
+    `dtype`.
+    """
+    _TYPECODES = {("i", 4): "i", ("i", 8): "q", ("f", 8): "d"}
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.columns = {
+            name: array.array(self._TYPECODES[dtype[name].kind,
+                                              dtype[name].itemsize])
+            for name in dtype.names
+        }
+
+    def __len__(self):
+        return len(self.columns[self.dtype.names[0]])
+
+    def append(self, row):
+        for name, column in self.columns.items():
+            column.append(_column_value(row.get(name), self.dtype[name]))
+
+    def to_array(self):
+        res = np.empty(len(self.columns[self.dtype.names[0]]),
+                       dtype=self.dtype)
+        for name, column in self.columns.items():
+            res[name] = np.frombuffer(column, dtype=self.dtype[name])
+        return res
+
+
+class _NpyWriter(object):
+    """
+    Writes a one-dimensional array of `dtype` to the binary file `npyfile`
+    in the .npy format chunk by chunk, so the array never has to be in
+    memory as a whole. The length of the array in the header is only known
+    in `finish()`, so the header is padded to fit any length.
+    """
+    def __init__(self, npyfile, dtype):
+        self.npyfile = npyfile
+        self.dtype = dtype
+        self.length = 0
+        # magic string, version, and header length take 10 bytes, the data
+        # is aligned to 64 bytes
+        self._header_len = -(-(10 + len(self._header(1 << 63))) // 64) * \
+            64 - 10
+        self.npyfile.write(self._encoded_header())
+
+    def _header(self, length):
+        return repr({"descr": np.lib.format.dtype_to_descr(self.dtype),
+                     "fortran_order": False, "shape": (length,)})
+
+    def _encoded_header(self):
+        header = self._header(self.length)
+        header = header.ljust(self._header_len - 1) + "\n"
+        return np.lib.format.magic(1, 0) + \
+            struct.pack("<H", self._header_len) + header.encode("latin1")
+
+    def write(self, chunk):
+        self.npyfile.write(np.ascontiguousarray(chunk, self.dtype).tobytes())
+        self.length += len(chunk)
+
+    def finish(self):
+        self.npyfile.seek(0)
+        self.npyfile.write(self._encoded_header())
+        self.npyfile.seek(0, os.SEEK_END)
+
+
+class _ColumnarWriter(object):
+    """
+    Wraps a `csv.DictWriter` to also write all rows to the binary file
+    `npyfile` as an array of `dtype` and, if given, add them to the
+    `_RunSummary` `summary`. The rows are collected in a `_ColumnStore` and
+    appended to the file every NPY_CHUNK_ROWS rows, see `finish()`.
+    """
+    def __init__(self, writer, dtype, npyfile, summary=None):
+        self.writer = writer
+        self.store = _ColumnStore(dtype)
+        self.npy = _NpyWriter(npyfile, dtype)
+        self.summary = summary
+
+    def writerow(self, row):
+        self.writer.writerow(row)
+        self.store.append(row)
+        if len(self.store) >= NPY_CHUNK_ROWS:
+            self._flush()
+
+    def _flush(self):
+        chunk = self.store.to_array()
+        self.npy.write(chunk)
+        if self.summary is not None:
+            self.summary.add(chunk)
+        self.store = _ColumnStore(self.store.dtype)
+
+    def finish(self):
+        self._flush()
+        self.npy.finish()
+
+
+def _mark_npys_fresh(npynames):
+    # the CSVs are closed after the .npy files, so they may end up with a
+    # newer modification time, see _load_array()
+    for npyname in npynames:
+        os.utime(npyname)
+
+
+def _load_array(csvname, dtype):
+    npyname = _npyname(csvname)
+    if os.path.exists(npyname) and \
+       os.path.getmtime(npyname) >= os.path.getmtime(csvname):
+        res = np.load(npyname, mmap_mode="r")
+        if res.dtype == dtype:
+            return res
+    store = _ColumnStore(dtype)
+    with open_file(csvname) as csvfile:
+        for row in csv.DictReader(csvfile, delimiter=";"):
+            store.append(row)
+    return store.to_array()
+
+
+def load_times(csvname):
+    """
+    Returns the packets in times CSV `csvname` as an array of TIMES_DTYPE.
+    The .times.npy file next to it is memory-mapped instead of parsing the
+    CSV if it is up-to-date.
+    """
+    return _load_array(csvname, TIMES_DTYPE)
+
+
+def load_stats(csvname):
+    """
+    Returns the rows of stats CSV `csvname` as an array of STATS_DTYPE.
+    The .stats.npy file next to it is memory-mapped instead of parsing the
+    CSV if it is up-to-date.
+    """
+    return _load_array(csvname, STATS_DTYPE)
+
+
+def _load_db_array(db, table, run_id, dtype):
+    rows = db.execute(
+        "SELECT {} FROM {} WHERE run_id = ? ORDER BY rowid"
+        .format(", ".join(dtype.names), table), (run_id,)
+    ).fetchall()
+    res = np.empty(len(rows), dtype=dtype)
+    for i, name in enumerate(dtype.names):
+        missing = np.nan if dtype[name].kind == "f" else MISSING
+        res[name] = [missing if row[i] is None else row[i] for row in rows]
+    return res
+
+
+def db_load_times(db, run_id):
+    """
+    Returns the packets of run `run_id` in results database `db` (see
+    `open_db()`) like `load_times()`.
+    """
+    return _load_db_array(db, "packets", run_id, TIMES_DTYPE)
+
+
+def db_load_stats(db, run_id):
+    """
+    Returns the node statistics of run `run_id` in results database `db`
+    (see `open_db()`) like `load_stats()`.
+    """
+    return _load_db_array(db, "node_stats", run_id, STATS_DTYPE)
+
+
+class _RunSummary(object):
+    """
+    Accumulates the summary of a run (see `summarize_run()`) from chunks of
+    its packets, so the packets never have to be in memory as a whole.
+    """
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        # latency statistics by hops_to_sink
+        self.latency = {}
+
+    def add(self, times):
+        received = times[~np.isnan(times["recv_time"])]
+        latency = received["recv_time"] - received["send_time"]
+        self.sent += len(times)
+        self.received += len(received)
+        for hops in np.unique(received["hops_to_sink"]).tolist():
+            values = latency[received["hops_to_sink"] == hops]
+            if hops not in self.latency:
+                self.latency[hops] = {
+                    "hops_to_sink": hops, "count": 0, "sum": 0.0,
+                    "sum_sq": 0.0, "min": np.inf, "max": -np.inf,
+                    "sketch": QuantileSketch(),
+                }
+            hop = self.latency[hops]
+            hop["count"] += len(values)
+            hop["sum"] += float(values.sum())
+            hop["sum_sq"] += float((values ** 2).sum())
+            hop["min"] = min(hop["min"], float(values.min()))
+            hop["max"] = max(hop["max"], float(values.max()))
+            hop["sketch"].add(values)
+
+    def result(self, stats):
+        latency = []
+        for hops in sorted(self.latency):
+            hop = dict(self.latency[hops])
+            sketch = hop.pop("sketch")
+            hop["median"], hop["p90"], hop["p99"] = \
+                sketch.quantile([0.5, 0.9, 0.99]).tolist()
+            hop["sketch"] = sketch
+            latency.append(hop)
+        return {
+            "sent": self.sent,
+            "received": self.received,
+            "latency": latency,
+            "nodes": np.array(stats, dtype=STATS_DTYPE),
+        }
+
+
+def summarize_run(times, stats):
+    """
+    Returns the summary of a run from its packets `times` (see
+    `load_times()`) and node statistics `stats` (see `load_stats()`): the
+    number of packets sent and received, the latency statistics of the
+    received packets per hop count (count, sum, sum of squares, minimum,
+    maximum, median, 90th and 99th percentile in seconds, and a
+    `QuantileSketch` of the latencies), and `stats` itself as "nodes".
+
+    The median and percentiles are taken from the sketch, so they are
+    accurate up to its relative accuracy.
+    """
+    summary = _RunSummary()
+    summary.add(times)
+    return summary.result(stats)
+
+
+def write_summary(summaryname, summary):
+    summary = dict(summary)
+    summary["latency"] = [dict(hop, sketch=hop["sketch"].to_dict())
+                          for hop in summary["latency"]]
+    summary["nodes"] = {name: summary["nodes"][name].tolist()
+                        for name in STATS_DTYPE.names}
+    with open(summaryname, "w") as summary_file:
+        json.dump(summary, summary_file)
+
+
+def load_summary(summaryname):
+    """
+    Returns the run summary (see `summarize_run()`) in `summaryname`.
+    """
+    with open(summaryname) as summary_file:
+        summary = json.load(summary_file)
+    for hop in summary["latency"]:
+        hop["sketch"] = QuantileSketch.from_dict(hop["sketch"])
+    nodes = summary["nodes"]
+    summary["nodes"] = np.empty(len(nodes["node"]), dtype=STATS_DTYPE)
+    for name in STATS_DTYPE.names:
+        summary["nodes"][name] = nodes[name]
+    return summary
 
 
 def _global_to_link_local(addr):
     return addr.replace(GLOBAL_PREFIX, LINK_LOCAL_PREFIX)
 
 
-def _src_addr_to_src(addr, network, data_path=DATA_PATH):
-    with open(os.path.join(data_path, "{}.link_local.csv".format(network))) \
-         as lla_file:
+def _link_local_to_global(addr):
+    return addr.replace(LINK_LOCAL_PREFIX, GLOBAL_PREFIX)
+
+
+def _lla_csvname(network, data_path=DATA_PATH):
+    return os.path.join(data_path, "{}.link_local.csv".format(network))
+
+
+def _load_cached(kind, filename, load):
+    """
+    Returns `load(filename)`, but calls `load` only once per `kind` and
+    version of the file (identified by its modification time and size).
+    """
+    key = kind, os.path.realpath(filename)
+    stat = os.stat(key[1])
+    version = (stat.st_mtime_ns, stat.st_size)
+    if key in _FILE_CACHE and _FILE_CACHE[key][0] == version:
+        return _FILE_CACHE[key][1]
+    res = load(key[1])
+    _FILE_CACHE[key] = version, res
+    return res
+
+
+def _sha1(filename):
+    sha1 = hashlib.sha1()
+    with open(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def _read_addr_index(lla_csvname):
+    addr_index = {}
+    with open(lla_csvname) as lla_file:
         csvfile = csv.DictReader(lla_file)
         for row in csvfile:
-            if row["lla"] == _global_to_link_local(addr):
-                return row["node"]
-    return None
-
-
-def _parse_times_line(network, mode, data_len, line, match, times,
-                      data_path=DATA_PATH):
-    direction = match.group("dir")
-    addr = match.group("addr")
-    assert(((direction in ["out", "err"]) and addr is None) or
-           ((direction == "in") and (addr is not None)))
-    if direction in ["out", "err"]:
-        node = match.group("node")
-        pkt_id = int(match.group("pkt_id"), base=16)
+            addr_index.setdefault(row["lla"], row["node"])
+            addr_index.setdefault(_link_local_to_global(row["lla"]),
+                                  row["node"])
+    return addr_index
+
+
+def _addr_index(network, data_path=DATA_PATH):
+    """
+    Returns a dictionary mapping both the link-local and the global addresses
+    of all nodes in `network` to their node name.
+    """
+    return _load_cached("addr_index", _lla_csvname(network, data_path),
+                        _read_addr_index)
+
+
+def _edgelist_name(network, data_path=DATA_PATH):
+    return os.path.join(data_path, "{}.edgelist.gz".format(network))
+
+
+def topology_csvname(network, data_path=DATA_PATH):
+    return os.path.join(data_path, "{}.topology.csv".format(network))
+
+
+def _compute_topology(network_edgelist, sink):
+    graph = nx.read_edgelist(network_edgelist, data=[("weight", float)])
+    hops_to_sink = nx.single_source_shortest_path_length(graph, sink)
+    successors = nx.dfs_successors(graph, sink)
+    subtree_size = {}
+    for node in nx.dfs_postorder_nodes(graph, sink):
+        subtree_size[node] = 1 + sum(subtree_size[s]
+                                     for s in successors.get(node, []))
+    # keep the order of the nodes in the edge-list, the stats rows are
+    # written in it
+    return {
+        node: {
+            "node": node,
+            "hops_to_sink": hops_to_sink[node],
+            "successors": len(successors.get(node, [])),
+            "subtree_size": subtree_size[node],
+        } for node in graph.nodes if node in hops_to_sink
+    }
+
+
+def _write_topology(topology, csvname):
+    # write to temporary file first, so concurrent readers (e.g. in other
+    # worker processes) never see an incomplete file
+    tmp_csvname = "{}.{}".format(csvname, os.getpid())
+    with open(tmp_csvname, "w") as topology_csvfile:
+        topology_csv = csv.DictWriter(topology_csvfile,
+                                      fieldnames=TOPOLOGY_FIELDNAMES,
+                                      delimiter=";")
+        topology_csv.writeheader()
+        for row in topology.values():
+            topology_csv.writerow(row)
+    os.replace(tmp_csvname, csvname)
+
+
+def _read_topology(csvname):
+    with open(csvname) as topology_csvfile:
+        topology_csv = csv.DictReader(topology_csvfile, delimiter=";")
         return {
-            "mode": mode,
-            "data_len": data_len,
-            "src": node,
-            "pkt_id": pkt_id,
-            "send_time": float(match.group("time")),
-            "send_errno": int(match.group("errno") or 0)
+            row["node"]: {
+                "node": row["node"],
+                "hops_to_sink": int(row["hops_to_sink"]),
+                "successors": int(row["successors"]),
+                "subtree_size": int(row["subtree_size"]),
+            } for row in topology_csv
         }
-    else:
-        node = _src_addr_to_src(addr, network, data_path)
-        pkt_id = int(match.group("pkt_id"), base=16)
-        dst = match.group("node")
-        assert node is not None
-        if (node, pkt_id) not in times:
-            raise LogError("{} has no out from m3-{}"
-                           .format(line.strip(), node))
-        return {
-            "mode": mode,
-            "data_len": data_len,
-            "src": node,
-            "dst": dst,
-            "pkt_id": pkt_id,
-            "src_addr": addr,
-            "recv_time": float(match.group("time")),
+
+
+def _load_topology(network_edgelist, network, data_path):
+    csvname = topology_csvname(network, data_path)
+    if os.path.exists(csvname) and \
+       os.path.getmtime(csvname) >= os.path.getmtime(network_edgelist):
+        return _read_topology(csvname)
+    logging.info("Computing topology of {} to {}".format(network, csvname))
+    topology = _compute_topology(network_edgelist, network.split("x")[0])
+    _write_topology(topology, csvname)
+    return topology
+
+
+def network_topology(network, data_path=DATA_PATH):
+    """
+    Returns hops to the sink, number of successors and subtree size (including
+    the node itself) of every node in `network` within the tree rooted at the
+    sink.
+
+    The values are computed from `<network>.edgelist.gz` once and stored to
+    `<network>.topology.csv` for later use.
+    """
+    network_edgelist = _edgelist_name(network, data_path)
+    assert os.path.exists(network_edgelist)
+    return _load_cached(
+        "topology", network_edgelist,
+        lambda e: _load_topology(e, network, data_path)
+    )
+
+
+def _addr_to_node(addr_index, addr):
+    try:
+        return addr_index[addr]
+    except KeyError:
+        # address is not in the canonical form derived from the link-local
+        # address, so try the way round
+        node = addr_index.get(_global_to_link_local(addr))
+        if node is not None:
+            addr_index[addr] = node
+        return node
+
+
+def _src_addr_to_src(addr, network, data_path=DATA_PATH):
+    return _addr_to_node(_addr_index(network, data_path), addr)
+
+
+class _PacketStore(object):
+    """
+    The packets of a run by source (node number) and packet ID in compact
+    typed columns. Values common to all packets of the run (mode and data
+    length) and the address of each source are only stored once.
+
+    The 16-bit packet IDs of the log are unwrapped to sequence numbers per
+    source (see `unwrap_sent()` and `unwrap_received()`). Rows are indexed
+    by a dense per-source array over the sequence numbers, as those count up
+    for each source. The array starts at the oldest packet of the source
+    still in the store, so with `pop()` it only covers the outstanding
+    packets.
+    """
+    _COLUMNS = ["_src", "_pkt_id", "_send_time", "_recv_time", "_send_errno",
+                "_duplicates", "_ambiguous"]
+
+    def __init__(self, mode, data_len):
+        self.mode = mode
+        self.data_len = data_len
+        self.src_addrs = {}
+        self._src = array.array("i")
+        self._pkt_id = array.array("q")
+        self._send_time = array.array("d")
+        self._recv_time = array.array("d")
+        self._send_errno = array.array("i")
+        self._duplicates = array.array("i")
+        self._ambiguous = array.array("i")
+        # sequence number (minus the base of the source) to row (-1 for
+        # none) by source
+        self._index = {}
+        self._base = {}
+        self._last_seq = {}
+        self._removed = 0
+        # totals, including packets already removed by pop()
+        self.duplicates = 0
+        self.ambiguous = 0
+
+    def __len__(self):
+        return len(self._src) - self._removed
+
+    def __contains__(self, key):
+        return self._row(*key) >= 0
+
+    def _row(self, src, pkt_id):
+        index = self._index.get(src)
+        if index is None:
+            return -1
+        pkt_id -= self._base[src]
+        if pkt_id < 0 or pkt_id >= len(index):
+            return -1
+        return index[pkt_id]
+
+    def _set_row(self, src, pkt_id, row):
+        if src not in self._index:
+            self._index[src] = array.array("i")
+            self._base[src] = pkt_id
+        index = self._index[src]
+        if pkt_id < self._base[src]:
+            # a packet older than all packets in the store
+            index[:0] = array.array("i", [-1] * (self._base[src] - pkt_id))
+            self._base[src] = pkt_id
+        pkt_id -= self._base[src]
+        if pkt_id >= len(index):
+            index.extend([-1] * (pkt_id + 1 - len(index)))
+        index[pkt_id] = row
+
+    def last_seq(self, src):
+        """
+        Returns the highest sequence number sent by `src` so far (-1 if none).
+        """
+        return self._last_seq.get(src, -1)
+
+    def unwrap_sent(self, src, pkt_id):
+        """
+        Returns the sequence number of the packet with `pkt_id` sent next by
+        `src`. As the source sends its packets in order, this is the closest
+        sequence number to the last sent one with the same 16 low bits.
+
+        >>> store = _PacketStore("fwd", 16)
+        >>> store.send(1, store.unwrap_sent(1, 0xfffe), 1.0)
+        >>> store.unwrap_sent(1, 0xffff), store.unwrap_sent(1, 0x0001)
+        (65535, 65537)
+        """
+        last = self.last_seq(src)
+        if last < 0:
+            return pkt_id
+        delta = (pkt_id - last) % PKT_ID_RANGE
+        if delta > (PKT_ID_RANGE // 2) and last >= (PKT_ID_RANGE - delta):
+            # an older packet
+            return last - (PKT_ID_RANGE - delta)
+        return last + delta
+
+    def unwrap_received(self, src, pkt_id, recv_time, horizon):
+        """
+        Returns the sequence number of the packet with `pkt_id` from `src`
+        received at `recv_time` and whether it is ambiguous. That is the most
+        recently sent packet with the same 16 low bits that was not sent
+        after `recv_time`. The reception is ambiguous if the packet one wrap
+        earlier was not received either and was sent within `horizon`
+        seconds before `recv_time`, so it may as well be that packet.
+        """
+        last = self.last_seq(src)
+        seq = last - ((last - pkt_id) % PKT_ID_RANGE)
+        if seq < 0:
+            # not sent (yet)
+            return pkt_id, False
+        row = self._row(src, seq)
+        older = seq - PKT_ID_RANGE
+        older_row = self._row(src, older) if older >= 0 else -1
+        if older_row < 0:
+            return seq, False
+        if row >= 0 and self._send_time[row] > recv_time:
+            # packet seq was sent after the reception
+            return older, False
+        if self._recv_time[older_row] != self._recv_time[older_row] and \
+           (recv_time - self._send_time[older_row]) <= horizon:
+            return seq, True
+        return seq, False
+
+    def send(self, src, seq, send_time, send_errno=0):
+        row = self._row(src, seq)
+        if seq > self.last_seq(src):
+            self._last_seq[src] = seq
+        if row < 0:
+            self._set_row(src, seq, len(self._src))
+            self._src.append(src)
+            self._pkt_id.append(seq)
+            self._send_time.append(send_time)
+            self._recv_time.append(np.nan)
+            self._send_errno.append(send_errno)
+            self._duplicates.append(0)
+            self._ambiguous.append(0)
+        else:
+            self._send_time[row] = send_time
+            self._send_errno[row] = send_errno
+
+    def receive(self, src, seq, recv_time, src_addr, ambiguous=False):
+        """
+        Marks a packet as received. Returns False if the packet is not in
+        the store. For duplicate receptions, the first reception time is
+        kept and the duplicate is counted.
+        """
+        row = self._row(src, seq)
+        if row < 0:
+            return False
+        if self._recv_time[row] == self._recv_time[row]:
+            self._duplicates[row] += 1
+            self.duplicates += 1
+        else:
+            self._recv_time[row] = recv_time
+        if ambiguous:
+            self._ambiguous[row] = 1
+            self.ambiguous += 1
+        self.src_addrs[src] = src_addr
+        return True
+
+    def received(self):
+        """
+        Returns the number of received packets.
+        """
+        return int(np.count_nonzero(
+            (np.frombuffer(self._src, dtype="i4") >= 0) &
+            ~np.isnan(np.frombuffer(self._recv_time, dtype="f8"))
+        ))
+
+    def _to_dict(self, row):
+        res = {
+            "mode": self.mode,
+            "data_len": self.data_len,
+            "src": "m3-{}".format(self._src[row]),
+            "pkt_id": self._pkt_id[row],
+            "send_time": self._send_time[row],
+            "send_errno": self._send_errno[row],
+            "duplicates": self._duplicates[row],
+            "ambiguous": self._ambiguous[row],
         }
+        recv_time = self._recv_time[row]
+        if recv_time == recv_time:
+            res["src_addr"] = self.src_addrs[self._src[row]]
+            res["recv_time"] = recv_time
+        return res
+
+    def pop(self, key):
+        """
+        Removes a packet from the store and returns it as a row for
+        `_write_times_row()`.
+        """
+        src, pkt_id = key
+        row = self._row(src, pkt_id)
+        res = self._to_dict(row)
+        self._index[src][pkt_id - self._base[src]] = -1
+        self._src[row] = -1
+        self._removed += 1
+        if self._removed > 1024 and self._removed > (len(self._src) // 2):
+            self._compact()
+        return res
+
+    def _compact(self):
+        keep = [row for row, src in enumerate(self._src) if src >= 0]
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name,
+                    array.array(column.typecode, (column[row]
+                                                  for row in keep)))
+        # pop() already cleared the index entries of the removed rows, so
+        # only the rows kept need to be updated
+        for row, (src, pkt_id) in enumerate(zip(self._src, self._pkt_id)):
+            self._index[src][pkt_id - self._base[src]] = row
+        # drop the entries before the oldest packet of each source left
+        for src, index in self._index.items():
+            kept = np.flatnonzero(np.frombuffer(index, dtype="i4") >= 0)
+            start = int(kept[0]) if len(kept) else len(index)
+            del index[:start]
+            self._base[src] += start
+        self._removed = 0
+
+    def rows(self):
+        """
+        Yields all packets in the order they were sent as rows for
+        `_write_times_row()`.
+        """
+        for row, src in enumerate(self._src):
+            if src >= 0:
+                yield self._to_dict(row)
 
 
 def _get_csv_writers(times_csvfile, stats_csvfile):
     times_fieldnames = ["mode", "data_len", "src", "dst",
                         "hops_to_sink", "pkt_id", "src_addr",
-                        "send_time", "recv_time", "send_errno"]
+                        "send_time", "recv_time", "send_errno",
+                        "duplicates", "ambiguous"]
     times_csv = csv.DictWriter(times_csvfile,
                                fieldnames=times_fieldnames,
                                delimiter=";")
     stats_fieldnames = ["node", "hops_to_sink", "successors",
-                        "l2_retrans", "pktbuf_usage", "pktbuf_size",
-                        "rbuf_full", "vrb_full"]
+                        "subtree_size", "l2_retrans", "pktbuf_usage",
+                        "pktbuf_size", "rbuf_full", "vrb_full"]
     stats_csv = csv.DictWriter(stats_csvfile,
                                fieldnames=stats_fieldnames,
                                delimiter=";")
@@ -140,115 +941,452 @@ def _get_csv_writers(times_csvfile, stats_csvfile):
     return times_csv, stats_csv
 
 
-def _write_csvs(times, times_csvfile, stats, stats_csvfile, graph, sink):
-    times_csv, stats_csv = _get_csv_writers(times_csvfile, stats_csvfile)
-    for row in times.values():
-        row["dst"] = sink
-        shortest_path = nx.shortest_path(graph, row["src"], sink)
-        row["hops_to_sink"] = len(shortest_path) - 1
-        times_csv.writerow(row)
-    successors = nx.dfs_successors(graph, sink)
+def _write_times_row(times_csv, row, topology, sink):
+    row["dst"] = sink
+    row["hops_to_sink"] = topology[row["src"]]["hops_to_sink"]
+    times_csv.writerow(row)
+
+
+def _write_csvs(times, times_csv, stats, stats_csv, topology, sink):
+    for row in times.rows():
+        _write_times_row(times_csv, row, topology, sink)
     for row in stats.values():
         if "l2_retrans" in row:
             row["l2_retrans"] = max(row["l2_retrans"])
-        shortest_path = nx.shortest_path(graph, row["node"], sink)
-        row["hops_to_sink"] = len(shortest_path) - 1
-        row["successors"] = len(successors.get(row["node"], []))
+        row.update(topology[row["node"]])
         stats_csv.writerow(row)
 
 
-def log_to_csvs(logname, network, mode, data_len, data_path=DATA_PATH):
+def _log_packet_summary(logname, times):
+    if times.ambiguous:
+        logging.warning("{}: {} receptions with ambiguous packet IDs"
+                        .format(logname, times.ambiguous))
+    if times.duplicates:
+        logging.info("{}: {} duplicate receptions"
+                     .format(logname, times.duplicates))
+
+
+def _expire_packets(times, sent, emitted, now, loss_horizon, emit):
+    while sent and (sent[0][0] + loss_horizon) < now:
+        _, key = sent.popleft()
+        if key in times:
+            emit(times.pop(key))
+            emitted.add(key, now)
+    emitted.expire(now - loss_horizon)
+
+
+class _EmittedPackets(object):
+    """
+    Set of the packets emitted within the loss horizon, to tell late or
+    duplicate receptions from receptions of packets never sent.
+    """
+    def __init__(self):
+        self._keys = set()
+        self._order = collections.deque()
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def add(self, key, now):
+        self._keys.add(key)
+        self._order.append((now, key))
+
+    def expire(self, before):
+        while self._order and self._order[0][0] < before:
+            self._keys.discard(self._order.popleft()[1])
+
+
+class _LogParser(object):
+    """
+    Parses log lines into `times` (a `_PacketStore`) and `stats` (statistics
+    by node). The parser keeps its state between calls of `feed()`, so a log
+    can be parsed in chunks.
+
+    If `emit` is given, a packet is passed to `emit` and removed from `times`
+    `loss_horizon` seconds after it was sent, so `times` only holds the
+    packets sent within that time and their duplicate receptions are still
+    counted.
+    """
+    def __init__(self, network, mode, data_len, times, stats, addr_index,
+                 emit=None, loss_horizon=DEFAULT_LOSS_HORIZON):
+        self.network = network
+        self.mode = mode
+        self.data_len = data_len
+        self.times = times
+        self.stats = stats
+        self.addr_index = addr_index
+        self.emit = emit
+        self.loss_horizon = loss_horizon
+        self.experiment_started = False
+        self.sent = collections.deque()
+        self.emitted = _EmittedPackets()
+        self._c_started = re.compile(LOG_EXP_STARTED_PATTERN.encode())
+        self._c_line = re.compile(LOG_LINE_PATTERN)
+        # node numbers by node name and by source address
+        self._node_nums = {}
+        self._src_nums = {}
+
+    def _node_num(self, node):
+        res = self._node_nums.get(node)
+        if res is None:
+            res = self._node_nums[node] = node_num(node.decode())
+        return res
+
+    def _src_num(self, addr):
+        res = self._src_nums.get(addr)
+        if res is None:
+            node = _addr_to_node(self.addr_index, addr)
+            assert node is not None
+            res = self._src_nums[addr] = node_num(node)
+        return res
+
+    def feed(self, lines):
+        times = self.times
+        stats = self.stats
+        emit = self.emit
+        for line in lines:
+            if not self.experiment_started:
+                if self._c_started.search(line) is not None:
+                    self.experiment_started = True
+                continue
+
+            match = self._c_line.match(line)
+            if match is None:
+                continue
+            kind = match.lastgroup
+            if kind == "data":
+                pkt_id = int(match.group("pkt_id"), base=16)
+                now = float(match.group("time"))
+                if match.group("dir") == b"in":
+                    addr = match.group("addr").decode()
+                    src = self._src_num(addr)
+                    seq, ambiguous = times.unwrap_received(
+                        src, pkt_id, now, self.loss_horizon
+                    )
+                    key = src, seq
+                    if ambiguous:
+                        logging.warning("{}: packet ID is ambiguous, "
+                                        "assuming sequence number {}".format(
+                                            line.decode(errors="ignore")
+                                                .strip(), seq
+                                        ))
+                    if not times.receive(src, seq, now, addr, ambiguous):
+                        if key not in self.emitted:
+                            raise LogError(
+                                "{} has no out from m3-{}"
+                                .format(line.decode(errors="ignore").strip(),
+                                        src)
+                            )
+                        logging.warning("{}: packet already received or "
+                                        "lost".format(line.decode(
+                                            errors="ignore"
+                                        ).strip()))
+                        continue
+                else:
+                    src = self._node_num(match.group("node"))
+                    seq = times.unwrap_sent(src, pkt_id)
+                    key = src, seq
+                    times.send(src, seq, now,
+                               int(match.group("errno") or 0))
+                    if emit is not None:
+                        self.sent.append((now, key))
+                if emit is not None:
+                    _expire_packets(times, self.sent, self.emitted, now,
+                                    self.loss_horizon, emit)
+            elif kind == "l2_retrans":
+                node = match.group("node").decode()
+                l2_retrans = int(match.group(kind))
+                if "l2_retrans" in stats[node]:
+                    stats[node]["l2_retrans"].append(l2_retrans)
+                else:
+                    stats[node].update({"l2_retrans": [l2_retrans]})
+            else:
+                # pktbuf_size, pktbuf_usage, rbuf_full, or vrb_full
+                node = match.group("node").decode()
+                stats[node].update({kind: int(match.group(kind))})
+
+
+def _parse_log(logfile, network, mode, data_len, times, stats, addr_index,
+               emit=None, loss_horizon=DEFAULT_LOSS_HORIZON):
+    """
+    Parses all lines of `logfile`, see `_LogParser`.
+    """
+    _LogParser(network, mode, data_len, times, stats, addr_index, emit,
+               loss_horizon).feed(logfile)
+
+
+def log_to_csvs(logname, network, mode, data_len, data_path=DATA_PATH,
+                stream=False, loss_horizon=DEFAULT_LOSS_HORIZON,
+                compression=None):
+    """
+    Converts `logname` to CSVs (and their .npy counterparts) and a summary
+    (see `summarize_run()`). Returns the names of the written files or None
+    if the log could not be converted.
+    """
+    csvnames = [times_csvname(logname, compression),
+                stats_csvname(logname, compression)]
+    npynames = [_npyname(csvname) for csvname in csvnames]
+    outputs = csvnames + npynames + [summary_name(logname)]
     logging.info("Converting {} to CSVs".format(logname))
-    logging.info(" - {}".format(stats_csvname(logname)))
-    logging.info(" - {}".format(times_csvname(logname)))
+    logging.info(" - {}".format(csvnames[1]))
+    logging.info(" - {}".format(csvnames[0]))
 
     try:
-        network_edgelist = os.path.join(data_path,
-                                        "{}.edgelist.gz".format(network))
-        assert os.path.exists(network_edgelist)
-        with open(logname, "rb") as logfile, \
-                open(times_csvname(logname), "w") as times_csvfile, \
-                open(stats_csvname(logname), "w") as stats_csvfile:
-            c_started = re.compile(LOG_EXP_STARTED_PATTERN)
-
-            c_data = re.compile(LOG_DATA_PATTERN)
-
-            c_retrans = re.compile(LOG_RETRANS_PATTERN)
-            c_pktbuf_size = re.compile(LOG_PKTBUF_SIZE_PATTERN)
-            c_pktbuf_usage = re.compile(LOG_PKTBUF_USAGE_PATTERN)
-            c_rbuf = re.compile(LOG_RBUF_PATTERN)
-            c_vrb = re.compile(LOG_VRB_PATTERN)
-            experiment_started = False
-            times = {}
-            stats = {}
-            graph = nx.read_edgelist(network_edgelist,
-                                     data=[("weight", float)])
-            stats = {n: {"node": n} for n in graph.nodes}
+        topology = network_topology(network, data_path)
+        # remove CSVs of a previous conversion with another compression
+        _remove_files(set(_all_outputs(logname)) - set(outputs))
+        with open_file(logname, "rb") as logfile, \
+                open_file(csvnames[0], "w") as times_csvfile, \
+                open_file(csvnames[1], "w") as stats_csvfile, \
+                open(npynames[0], "wb") as times_npyfile, \
+                open(npynames[1], "wb") as stats_npyfile:
+            times = _PacketStore(mode, data_len)
+            stats = {n: {"node": n} for n in topology}
             sink = network.split("x")[0]
-            for line in logfile:
-                line = line.decode(errors="ignore")
-                if not experiment_started:
-                    if c_started.search(line) is not None:
-                        experiment_started = True
-                    continue
+            addr_index = _addr_index(network, data_path)
+            times_csv, stats_csv = _get_csv_writers(times_csvfile,
+                                                    stats_csvfile)
+            summary = _RunSummary()
+            times_csv = _ColumnarWriter(times_csv, TIMES_DTYPE,
+                                        times_npyfile, summary)
+            stats_csv = _ColumnarWriter(stats_csv, STATS_DTYPE,
+                                        stats_npyfile)
+            if stream:
+                def emit(row):
+                    _write_times_row(times_csv, row, topology, sink)
+            else:
+                emit = None
+            _parse_log(logfile, network, mode, data_len, times, stats,
+                       addr_index, emit, loss_horizon)
+            _log_packet_summary(logname, times)
+            _write_csvs(times, times_csv, stats, stats_csv, topology, sink)
+            times_csv.finish()
+            stats_csv.finish()
+        _mark_npys_fresh(npynames)
+        write_summary(outputs[4], summary.result(np.load(npynames[1])))
+    except LogError as exc:
+        _remove_files(outputs)
+        logging.error(exc)
+        return None
+    except BaseException as exc:
+        # do not leave partial outputs behind, they would look converted
+        _remove_files(outputs)
+        raise exc
+    return outputs
 
-                match = c_data.match(line)
-                if match is not None:
-                    res = _parse_times_line(network, mode, data_len,
-                                            line, match, times, data_path)
-                    if (res["src"], res["pkt_id"]) in times:
-                        times[res["src"], res["pkt_id"]].update(res)
-                    else:
-                        times[res["src"], res["pkt_id"]] = res
-                    continue
 
-                match = c_retrans.search(line)
-                if match is not None:
-                    node = match.group("node")
-                    l2_retrans = int(match.group("retrans"))
-                    if "l2_retrans" in stats[node]:
-                        stats[node]["l2_retrans"].append(l2_retrans)
-                    else:
-                        stats[node].update({"l2_retrans": [l2_retrans]})
-                    continue
+def _tmpname(filename):
+    # keep the extension, so open_file() treats the temporary file like the
+    # final one
+    dirname, basename = os.path.split(filename)
+    return os.path.join(dirname, ".{}.{}".format(os.getpid(), basename))
 
-                match = c_pktbuf_size.search(line)
-                if match is not None:
-                    node = match.group("node")
-                    pktbuf_size = int(match.group("pktbuf_size"))
-                    stats[node].update({"pktbuf_size": pktbuf_size})
-                    continue
 
-                match = c_pktbuf_usage.search(line)
-                if match is not None:
-                    node = match.group("node")
-                    pktbuf_usage = int(match.group("pktbuf_usage"))
-                    stats[node].update({"pktbuf_usage": pktbuf_usage})
-                    continue
+def _write_snapshot(outputs, times, stats, topology, sink):
+    # outputs are the CSVs, the .npy files, and the summary
+    tmpnames = [_tmpname(filename) for filename in outputs]
+    # _write_csvs() replaces the l2_retrans lists of the stats rows
+    stats = {node: dict(row) for node, row in stats.items()}
+    try:
+        with open_file(tmpnames[0], "w") as times_csvfile, \
+                open_file(tmpnames[1], "w") as stats_csvfile, \
+                open(tmpnames[2], "wb") as times_npyfile, \
+                open(tmpnames[3], "wb") as stats_npyfile:
+            times_csv, stats_csv = _get_csv_writers(times_csvfile,
+                                                    stats_csvfile)
+            summary = _RunSummary()
+            times_csv = _ColumnarWriter(times_csv, TIMES_DTYPE,
+                                        times_npyfile, summary)
+            stats_csv = _ColumnarWriter(stats_csv, STATS_DTYPE,
+                                        stats_npyfile)
+            _write_csvs(times, times_csv, stats, stats_csv, topology, sink)
+            times_csv.finish()
+            stats_csv.finish()
+        _mark_npys_fresh(tmpnames[2:4])
+        write_summary(tmpnames[4], summary.result(np.load(tmpnames[3])))
+    except BaseException as exc:
+        _remove_files(tmpnames)
+        raise exc
+    # replace the CSVs first, so the old .npy files are never taken for the
+    # new CSVs, see _load_array()
+    for tmpname, filename in zip(tmpnames, outputs):
+        os.replace(tmpname, filename)
 
-                match = c_rbuf.search(line)
-                if match is not None:
-                    node = match.group("node")
-                    rbuf_full = int(match.group("rbuf_full"))
-                    stats[node].update({"rbuf_full": rbuf_full})
-                    continue
 
-                match = c_vrb.search(line)
-                if match is not None:
-                    node = match.group("node")
-                    vrb_full = int(match.group("vrb_full"))
-                    stats[node].update({"vrb_full": vrb_full})
+def _checkpoint_name(logname):
+    return "{}.follow.pickle".format(_log_basename(logname))
+
+
+def _read_checkpoint(logname, network, mode, data_len):
+    try:
+        with open(_checkpoint_name(logname), "rb") as checkpoint_file:
+            checkpoint = pickle.load(checkpoint_file)
+            # checkpoints without the ID of the following process are from
+            # before it was stored and have no parser state after it
+            if "pid" not in checkpoint:
+                return None
+            checkpoint.update(pickle.load(checkpoint_file))
+    except FileNotFoundError:
+        return None
+    if checkpoint["parser_version"] != PARSER_VERSION or \
+       checkpoint["config"] != [network, mode, data_len]:
+        return None
+    return checkpoint
+
+
+def _write_checkpoint(logname, network, mode, data_len, offset, parser):
+    checkpoint_name = _checkpoint_name(logname)
+    tmp_name = "{}.{}".format(checkpoint_name, os.getpid())
+    with open(tmp_name, "wb") as checkpoint_file:
+        # the process ID comes first, so is_followed() does not need to load
+        # the parser state
+        pickle.dump({
+            "pid": os.getpid(),
+            "parser_version": PARSER_VERSION,
+            "config": [network, mode, data_len],
+        }, checkpoint_file)
+        pickle.dump({
+            "offset": offset,
+            "experiment_started": parser.experiment_started,
+            "times": parser.times,
+            "stats": parser.stats,
+        }, checkpoint_file)
+    os.replace(tmp_name, checkpoint_name)
+
+
+def _process_exited(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def is_followed(logname):
+    """
+    Checks if `logname` is currently converted by `follow_log()`, i.e. its
+    checkpoint was written by a process that is still running. The
+    checkpoint of a follower that crashed does not count.
+    """
+    try:
+        with open(_checkpoint_name(logname), "rb") as checkpoint_file:
+            pid = pickle.load(checkpoint_file).get("pid")
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return False
+    return pid is not None and not _process_exited(pid)
+
+
+def follow_log(logname, network, mode, data_len, data_path=DATA_PATH,
+               interval=DEFAULT_FOLLOW_INTERVAL,
+               idle_timeout=DEFAULT_IDLE_TIMEOUT, pid=None,
+               compression=None):
+    """
+    Converts `logname` to CSVs while it is still written, e.g. by the serial
+    aggregator during an experiment run.
+
+    Every `interval` seconds the lines appended to the log are parsed and the
+    CSVs (and their .npy counterparts and the summary) are replaced with the
+    results so far.
+    The byte offset and the parser state are checkpointed next to the log, so
+    following an interrupted log resumes where it left off. Following ends
+    when the log did not grow for `idle_timeout` seconds or once process
+    `pid` exited. Returns the names of the written files or None if the log
+    could not be converted.
+    """
+    if not logname.endswith(".log"):
+        logging.error("Can only follow uncompressed logs, not {}"
+                      .format(logname))
+        return None
+    csvnames = [times_csvname(logname, compression),
+                stats_csvname(logname, compression)]
+    outputs = csvnames + [_npyname(csvname) for csvname in csvnames] + \
+        [summary_name(logname)]
+    logging.info("Following {}".format(logname))
+
+    try:
+        topology = network_topology(network, data_path)
+        _remove_files(set(_all_outputs(logname)) - set(outputs))
+        sink = network.split("x")[0]
+        addr_index = _addr_index(network, data_path)
+
+        def new_parser():
+            return _LogParser(network, mode, data_len,
+                              _PacketStore(mode, data_len),
+                              {n: {"node": n} for n in topology}, addr_index)
+
+        parser = new_parser()
+        offset = 0
+        checkpoint = _read_checkpoint(logname, network, mode, data_len)
+        if checkpoint is not None:
+            logging.info("Resuming {} at byte {}"
+                         .format(logname, checkpoint["offset"]))
+            offset = checkpoint["offset"]
+            parser.experiment_started = checkpoint["experiment_started"]
+            parser.times = checkpoint["times"]
+            parser.stats = checkpoint["stats"]
+        # mark the log as followed right away, see is_followed()
+        _write_checkpoint(logname, network, mode, data_len, offset, parser)
+        last_size = None
+        last_growth = time.monotonic()
+        done = False
+        while not done:
+            # check before reading, so lines written before the process
+            # exited are still parsed
+            done = _process_exited(pid)
+            size = os.path.getsize(logname) if os.path.exists(logname) else 0
+            if size != last_size:
+                last_size = size
+                last_growth = time.monotonic()
+            elif (time.monotonic() - last_growth) >= idle_timeout:
+                logging.info("{} did not grow for {}s"
+                             .format(logname, idle_timeout))
+                done = True
+            if size < offset:
+                logging.warning("{} was truncated, starting over"
+                                .format(logname))
+                parser = new_parser()
+                offset = 0
+            if size > offset:
+                with open(logname, "rb") as logfile:
+                    logfile.seek(offset)
+                    chunk = logfile.read(min(size - offset,
+                                             FOLLOW_CHUNK_SIZE))
+                # only parse complete lines, an incomplete last line is
+                # parsed with the next chunk
+                end = chunk.rfind(b"\n") + 1
+                parser.feed(chunk[:end].splitlines(keepends=True))
+                offset += end
+                if (size - offset) >= FOLLOW_CHUNK_SIZE:
+                    # catch up before writing outputs
                     continue
-            _write_csvs(times, times_csvfile, stats, stats_csvfile,
-                        graph, sink)
-    except KeyboardInterrupt as exc:
-        os.remove(times_csvname(logname))
-        os.remove(stats_csvname(logname))
-        raise exc
+                if end:
+                    _write_snapshot(outputs, parser.times, parser.stats,
+                                    topology, sink)
+                    _write_checkpoint(logname, network, mode, data_len,
+                                      offset, parser)
+                    logging.info("{}: {} packets sent, {} received".format(
+                        os.path.basename(logname), len(parser.times),
+                        parser.times.received()
+                    ))
+            if not done:
+                time.sleep(interval)
+        if os.path.exists(logname):
+            with open(logname, "rb") as logfile:
+                logfile.seek(offset)
+                # the log may end without a newline
+                parser.feed(logfile)
+        _log_packet_summary(logname, parser.times)
+        _write_snapshot(outputs, parser.times, parser.stats, topology, sink)
+        _remove_files([_checkpoint_name(logname)])
     except LogError as exc:
-        os.remove(times_csvname(logname))
-        os.remove(stats_csvname(logname))
+        _remove_files(outputs + [_checkpoint_name(logname)])
         logging.error(exc)
+        return None
+    return outputs
 
 
 def match_to_dict(match):
@@ -258,16 +1396,374 @@ def match_to_dict(match):
     return res
 
 
-def logs_to_csvs(data_path=DATA_PATH):
+def _output_mtimes(logname):
+    return {filename: os.path.getmtime(filename)
+            for filename in _all_outputs(logname)
+            if os.path.exists(filename)}
+
+
+def _remove_partial_outputs(lognames, output_mtimes):
+    # only remove outputs that were touched since the conversion started, so
+    # that outputs of logs still waiting for a worker survive
+    for logname in lognames:
+        for filename in _all_outputs(logname):
+            if os.path.exists(filename) and \
+               os.path.getmtime(filename) != \
+               output_mtimes[logname].get(filename):
+                os.remove(filename)
+
+
+class _RecordingHandler(logging.handlers.QueueHandler):
+    def __init__(self):
+        super().__init__(None)
+        self.records = []
+
+    def enqueue(self, record):
+        self.records.append(record)
+
+
+def _init_worker(level):
+    global _worker_log_handler
+
+    # the parent process handles KeyboardInterrupt for all workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_log_handler = _RecordingHandler()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_worker_log_handler)
+    root.setLevel(level)
+
+
+def _read_manifest(data_path=DATA_PATH):
+    try:
+        with open(os.path.join(data_path, MANIFEST_NAME)) as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_manifest(manifest, data_path=DATA_PATH):
+    manifest_name = os.path.join(data_path, MANIFEST_NAME)
+    tmp_name = "{}.{}".format(manifest_name, os.getpid())
+    with open(tmp_name, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+    os.replace(tmp_name, manifest_name)
+
+
+def _manifest_entry(logname, network, data_path=DATA_PATH):
+    stat = os.stat(logname)
+    return {
+        "parser_version": PARSER_VERSION,
+        "log": {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha1": _sha1(logname),
+        },
+        "edgelist_sha1": _load_cached(
+            "sha1", _edgelist_name(network, data_path), _sha1
+        ),
+        "link_local_sha1": _load_cached(
+            "sha1", _lla_csvname(network, data_path), _sha1
+        ),
+        "outputs": {},
+    }
+
+
+def _up_to_date(logname, network, data_path, entry):
+    """
+    Checks if the outputs of `logname` recorded in manifest `entry` are
+    still valid, i.e. the inputs of the conversion did not change and the
+    outputs are complete. If only the modification time of the log changed,
+    it is updated in `entry`, so the log is not hashed again.
+    """
+    if entry is None or entry["parser_version"] != PARSER_VERSION:
+        return False
+    stat = os.stat(logname)
+    if stat.st_size != entry["log"]["size"]:
+        return False
+    # only hash log if it might have changed
+    if stat.st_mtime_ns != entry["log"]["mtime_ns"]:
+        if _sha1(logname) != entry["log"]["sha1"]:
+            return False
+        entry["log"]["mtime_ns"] = stat.st_mtime_ns
+    for kind, filename in [("edgelist", _edgelist_name(network, data_path)),
+                           ("link_local", _lla_csvname(network, data_path))]:
+        if _load_cached("sha1", filename, _sha1) != \
+           entry["{}_sha1".format(kind)]:
+            return False
+    for output, size in entry["outputs"].items():
+        output = os.path.join(data_path, output)
+        if not os.path.exists(output) or os.path.getsize(output) != size:
+            return False
+    return True
+
+
+def _set_outputs(entry, outputs):
+    if outputs is None:
+        return None
+    entry["outputs"] = {os.path.basename(output): os.path.getsize(output)
+                        for output in outputs}
+    return entry
+
+
+def _convert_log(logname, kwargs):
+    entry = _manifest_entry(logname, kwargs["network"], kwargs["data_path"])
+    return _set_outputs(entry, log_to_csvs(logname, **kwargs))
+
+
+def _update_manifest(manifest, data_path, logname, entry):
+    if entry is None:
+        manifest.pop(os.path.basename(logname), None)
+    else:
+        manifest[os.path.basename(logname)] = entry
+    _write_manifest(manifest, data_path)
+
+
+def _log_to_csvs_worker(args):
+    logname, kwargs = args
+    _worker_log_handler.records = []
+    entry = _convert_log(logname, kwargs)
+    return logname, entry, _worker_log_handler.records
+
+
+def _find_logs(data_path=DATA_PATH):
     comp = re.compile(LOG_NAME_PATTERN)
-    for logname in os.listdir(data_path):
+    basenames = set()
+    # sorting puts an uncompressed log before its compressed versions, so
+    # those are skipped
+    for logname in sorted(os.listdir(data_path)):
         match = comp.match(logname)
-        if match is not None:
-            logname = os.path.join(data_path, logname)
-            log_to_csvs(logname, data_path=data_path, **match_to_dict(match))
+        if match is not None and _log_basename(logname) not in basenames:
+            basenames.add(_log_basename(logname))
+            yield os.path.join(data_path, logname), match_to_dict(match)
 
 
-if __name__ == "__main__":
+def open_db(dbname):
+    """
+    Opens the results database `dbname` (see RESULTS_DB_SCHEMA), creating it
+    if it does not exist.
+    """
+    db = sqlite3.connect(dbname)
+    db.execute("PRAGMA foreign_keys = ON")
+    db.executescript(RESULTS_DB_SCHEMA)
+    return db
+
+
+def _db_rows(rows):
+    # NULL instead of the placeholders for missing values
+    columns = [
+        [None if v != v else v for v in rows[name].tolist()]
+        if rows.dtype[name].kind == "f" else
+        [None if v == MISSING else v for v in rows[name].tolist()]
+        for name in rows.dtype.names
+    ]
+    return zip(*columns)
+
+
+def _ingest_run(db, logname, entry):
+    name = os.path.basename(logname)
+    info = re.match(RUN_NAME_PATTERN, name).groupdict()
+    outputs = [os.path.join(os.path.dirname(logname), output)
+               for output in entry["outputs"]]
+    times_csv = next(o for o in outputs if re.search(r"\.times\.csv", o))
+    stats_csv = next(o for o in outputs if re.search(r"\.stats\.csv", o))
+    with db:
+        db.execute("DELETE FROM runs WHERE name = ?", (name,))
+        run_id = db.execute(
+            "INSERT INTO runs (name, log_sha1, parser_version, network, "
+            "mode, data_len, delay, count, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (name, entry["log"]["sha1"], entry["parser_version"],
+             info["network"], info["mode"], int(info["data_len"]),
+             int(info["delay"]), int(info["count"]), int(info["timestamp"]))
+        ).lastrowid
+        for table, rows in [("packets", load_times(times_csv)),
+                            ("node_stats", load_stats(stats_csv))]:
+            db.executemany(
+                "INSERT INTO {} (run_id, {}) VALUES (?, {})".format(
+                    table, ", ".join(rows.dtype.names),
+                    ", ".join("?" for _ in rows.dtype.names)
+                ),
+                ((run_id,) + row for row in _db_rows(rows))
+            )
+
+
+def sync_db(dbname, data_path=DATA_PATH):
+    """
+    Ingests the runs converted in `data_path` (according to its manifest)
+    into the results database `dbname` that are not in there yet or changed
+    since, and removes runs whose log was removed or failed to convert.
+    """
+    manifest = _read_manifest(data_path)
+    db = open_db(dbname)
+    try:
+        ingested = dict(db.execute(
+            "SELECT name, log_sha1 || ':' || parser_version FROM runs"
+        ))
+        for name in set(ingested) - set(manifest):
+            logging.info("Removing {} from {}".format(name, dbname))
+            with db:
+                db.execute("DELETE FROM runs WHERE name = ?", (name,))
+        for name, entry in sorted(manifest.items()):
+            version = "{}:{}".format(entry["log"]["sha1"],
+                                     entry["parser_version"])
+            if ingested.get(name) == version:
+                continue
+            logging.info("Ingesting {} into {}".format(name, dbname))
+            _ingest_run(db, os.path.join(data_path, name), entry)
+    finally:
+        db.close()
+
+
+def _convert_logs(logs, manifest, data_path, jobs):
+    if jobs == 1 or len(logs) < 2:
+        for logname, kwargs in logs:
+            entry = _convert_log(logname, kwargs)
+            _update_manifest(manifest, data_path, logname, entry)
+        return
+    pending = set(logname for logname, _ in logs)
+    output_mtimes = {logname: _output_mtimes(logname) for logname in pending}
+    root = logging.getLogger()
+    with multiprocessing.Pool(jobs or None, _init_worker,
+                              (root.getEffectiveLevel(),)) as pool:
+        try:
+            # imap keeps the order of logs, so log output is in order as well
+            for logname, entry, records in pool.imap(_log_to_csvs_worker,
+                                                     logs):
+                for record in records:
+                    root.handle(record)
+                _update_manifest(manifest, data_path, logname, entry)
+                pending.remove(logname)
+        except KeyboardInterrupt as exc:
+            pool.terminate()
+            pool.join()
+            _remove_partial_outputs(pending, output_mtimes)
+            raise exc
+
+
+def logs_to_csvs(data_path=DATA_PATH, jobs=1, incremental=False, db=None,
+                 **kwargs):
+    """
+    Converts all logs in `data_path` to CSVs. Further keyword arguments are
+    passed to `log_to_csvs()`.
+
+    Each conversion is recorded in the manifest file MANIFEST_NAME in
+    `data_path`. With `incremental` only logs are converted whose inputs
+    changed since their recorded conversion or whose outputs are incomplete.
+    Logs currently converted by `follow_log()` are skipped then.
+
+    With `jobs` other than 1 the logs are converted in a pool of that many
+    worker processes (0 for one per CPU).
+
+    If `db` is given, the results database of that name is synchronized with
+    the converted logs afterwards, see `sync_db()`.
+    """
+    manifest = _read_manifest(data_path)
+    logs = [(logname, dict(data_path=data_path, **match_kwargs, **kwargs))
+            for logname, match_kwargs in _find_logs(data_path)]
+    if incremental:
+        outdated = []
+        touched = False
+        for logname, kwargs in logs:
+            if is_followed(logname):
+                continue
+            entry = manifest.get(os.path.basename(logname))
+            mtime_ns = None if entry is None else entry["log"]["mtime_ns"]
+            if not _up_to_date(logname, kwargs["network"], data_path, entry):
+                outdated.append((logname, kwargs))
+            elif entry["log"]["mtime_ns"] != mtime_ns:
+                touched = True
+        if touched:
+            # store the new modification times of the unchanged logs
+            _write_manifest(manifest, data_path)
+        logs = outdated
+    _convert_logs(logs, manifest, data_path, jobs)
+    if db is not None:
+        sync_db(db, data_path)
+
+
+def follow(logname, db=None, **kwargs):
+    """
+    Follows `logname` with `follow_log()` and records the conversion in the
+    manifest of the log's directory (and synchronizes the results database
+    `db` with it, if given). The network of the log is expected in the same
+    directory. Further keyword arguments are passed to `follow_log()`.
+    """
+    match = re.match(LOG_NAME_PATTERN, os.path.basename(logname))
+    if match is None:
+        raise LogError("Unexpected log name {}".format(logname))
+    data_path = os.path.dirname(os.path.abspath(logname))
+    match_kwargs = match_to_dict(match)
+    outputs = follow_log(logname, data_path=data_path, **match_kwargs,
+                         **kwargs)
+    entry = _manifest_entry(logname, match_kwargs["network"], data_path)
+    _update_manifest(_read_manifest(data_path), data_path, logname,
+                     _set_outputs(entry, outputs))
+    if db is not None:
+        sync_db(db, data_path)
+
+
+def main():
     logging.basicConfig(format='%(levelname)s: %(message)s',
                         level=logging.INFO)
-    logs_to_csvs()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-j", "--jobs", default=1, type=int,
+                        help="Number of logs to convert in parallel, 0 for "
+                             "one per CPU (default: 1)")
+    parser.add_argument("-s", "--stream", action="store_true",
+                        help="Write each packet once --loss-horizon "
+                             "seconds passed since it was sent instead of "
+                             "keeping all packets in memory until the end "
+                             "of the log")
+    parser.add_argument("--loss-horizon", default=DEFAULT_LOSS_HORIZON,
+                        type=float,
+                        help="Seconds after which a packet that was not "
+                             "received is considered lost, with --stream, "
+                             "or its packet ID ambiguous after wrap-around "
+                             "(default: {})".format(DEFAULT_LOSS_HORIZON))
+    parser.add_argument("-z", "--compression", default=None,
+                        choices=COMPRESSIONS,
+                        help="Compress the CSVs with the given format")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="Only convert logs whose inputs changed since "
+                             "their last conversion or whose outputs are "
+                             "incomplete")
+    parser.add_argument("-f", "--follow", default=None, metavar="LOG",
+                        help="Convert LOG while it is still written instead "
+                             "of converting all logs")
+    parser.add_argument("--interval", default=DEFAULT_FOLLOW_INTERVAL,
+                        type=float,
+                        help="With --follow: seconds between updates of the "
+                             "CSVs (default: {})"
+                             .format(DEFAULT_FOLLOW_INTERVAL))
+    parser.add_argument("--idle-timeout", default=DEFAULT_IDLE_TIMEOUT,
+                        type=float,
+                        help="With --follow: stop after LOG did not grow "
+                             "for that many seconds (default: {})"
+                             .format(DEFAULT_IDLE_TIMEOUT))
+    parser.add_argument("--pid", default=None, type=int,
+                        help="With --follow: stop once the process with "
+                             "that ID exited")
+    parser.add_argument("-d", "--db", action="store_true",
+                        help="Also ingest the results into an SQLite "
+                             "database, see --db-path")
+    parser.add_argument("--db-path",
+                        default=os.path.join(DATA_PATH, RESULTS_DB_NAME),
+                        help="SQLite database for --db (default: {} in "
+                             "DATA_PATH)".format(RESULTS_DB_NAME))
+    args = parser.parse_args()
+    db = args.db_path if args.db else None
+    if args.follow is not None:
+        follow(args.follow, db=db, interval=args.interval,
+               idle_timeout=args.idle_timeout, pid=args.pid,
+               compression=args.compression)
+        return
+    logs_to_csvs(jobs=args.jobs, incremental=args.incremental, db=db,
+                 stream=args.stream,
+                 loss_horizon=args.loss_horizon,
+                 compression=args.compression)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,18 +8,22 @@
 
 import argparse
 import copy
-import csv
 import logging
 import matplotlib
+import multiprocessing
 import numpy as np
 import os
 import re
+import time
 
 from matplotlib import pyplot as plt
-from matplotlib.colors import ListedColormap, rgb_to_hsv, hsv_to_rgb, to_rgba
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import ListedColormap, Normalize, rgb_to_hsv, \
+    hsv_to_rgb, to_rgba
 from matplotlib.patches import Patch
 
 import parse_results
+from quantile_sketch import QuantileSketch
 
 __author__ = "Martine S. Lenders"
 __copyright__ = "Copyright 2019 Freie Universität Berlin"
@@ -43,14 +47,14 @@ SAVEFIG_OPTS = {
     "dpi": 150,
     "bbox_inches": "tight"
 }
+DASHBOARD_NAME = "plot_results.html"
+DEFAULT_WATCH_INTERVAL = 60
 
-NAME_PATTERN = parse_results.NAME_PATTERN.format(
-    mode=r"(?P<mode>(reass|fwd))",
-    data_len=r"(?P<data_len>\d+)",
-    delay=r"\d+"
+# files of a run, kind is e.g. "log" or "times.csv"
+RESULT_NAME_PATTERN = r"{}\.(?P<kind>[a-z_.]+?){}$".format(
+    parse_results.RUN_NAME_PATTERN, parse_results.COMPRESSION_PATTERN
 )
-TIMES_CSV_NAME_PATTERN_FMT = "{}.times.csv".format(parse_results.NAME_PATTERN)
-STATS_CSV_NAME_PATTERN_FMT = "{}.stats.csv".format(parse_results.NAME_PATTERN)
+RESULT_NAME_INTS = ["channel", "data_len", "count", "delay", "timestamp"]
 
 RUNS = 3
 MODES = ["reass", "fwd"]
@@ -58,84 +62,121 @@ DATA_LENS = [16, 80, 176, 272, 368, 464, 560, 656,
              752, 848, 944, 1040, 1136, 1232]
 DELAY = 10000
 MAX_HOPS = 7
+LAT_PERCENTILES = [50, 90, 99]
 
+FILE_LOADERS = {
+    "times": parse_results.load_times,
+    "stats": parse_results.load_stats,
+    "summary": parse_results.load_summary,
+}
+
+# dataset of a plot rendering process, see render_plots()
+_RENDER_DATASET = None
+
+
+def pdr_stats(dataset, runs=RUNS):
+    """
+    Returns the networks and the mean and standard deviation of the packet
+    delivery ratio (in percent) of the last `runs` runs for each mode and
+    data length, indexed by [mode][data_len] (see MODES and DATA_LENS).
+    """
+    networks = set()
+    groups = []
+    pdrs = []
+    for group, (mode, data_len) in enumerate(_groups()):
+        for _, network, summary in dataset.runs("summary", mode, data_len,
+                                                runs):
+            networks.add(network)
+            if (summary["sent"] > 0):
+                groups.append(group)
+                pdrs.append(100 * summary["received"] / summary["sent"])
+    means, errs = _group_stats(np.array(groups, dtype=int),
+                               np.array(pdrs, dtype=np.double),
+                               len(MODES) * len(DATA_LENS))
+    shape = len(MODES), len(DATA_LENS)
+    return networks, means.reshape(shape), errs.reshape(shape)
 
-def plot_pdr(runs=RUNS):
-    plt.clf()
+
+def latency_sketches(dataset, runs=RUNS):
+    """
+    Returns the networks and the source-to-sink latencies (in s) of the
+    packets of the last `runs` runs as merged `QuantileSketch`es by (mode,
+    data_len, hops_to_sink).
+    """
+    networks = set()
+    sketches = {}
+    for mode, data_len in _groups():
+        for _, network, summary in dataset.runs("summary", mode, data_len,
+                                                runs):
+            networks.add(network)
+            for hop in summary["latency"]:
+                key = mode, data_len, hop["hops_to_sink"]
+                if key not in sketches:
+                    sketches[key] = QuantileSketch(hop["sketch"].alpha)
+                sketches[key].merge(hop["sketch"])
+    return networks, sketches
+
+
+def lat_stats(dataset, runs=RUNS):
+    """
+    Returns the networks and the mean and standard deviation of the
+    source-to-sink latency (in ms) of the packets of the last `runs` runs
+    for each mode, data length, and hop count, indexed by
+    [mode][data_len][hops - 2] (see MODES, DATA_LENS, and MAX_HOPS).
+    """
     networks = set()
+    hop_counts = MAX_HOPS - 2
+    groups = []
+    latencies = []
+    for group, (mode, data_len) in enumerate(_groups()):
+        for _, network, times in dataset.runs("times", mode, data_len, runs):
+            networks.add(network)
+            times = times[~np.isnan(times["recv_time"])]
+            hops = times["hops_to_sink"].astype(int) - 2
+            valid = (hops >= 0) & (hops < hop_counts)
+            groups.append(group * hop_counts + hops[valid])
+            latencies.append(1000 * (times["recv_time"][valid] -
+                                     times["send_time"][valid]))
+    means, errs = _group_stats(
+        np.concatenate(groups) if groups else np.empty(0, dtype=int),
+        np.concatenate(latencies) if latencies else np.empty(0),
+        len(MODES) * len(DATA_LENS) * hop_counts
+    )
+    shape = len(MODES), len(DATA_LENS), hop_counts
+    return networks, means.reshape(shape), errs.reshape(shape)
+
+
+def plot_pdr(dataset, runs=RUNS):
+    fig, ax = plt.subplots()
+    networks, pdr_means, pdr_errs = pdr_stats(dataset, runs)
     for o, mode in enumerate(MODES):
-        pdrs = {s: [] for s in DATA_LENS}
-        for data_len in DATA_LENS:
-            filenames = _get_files(DELAY, mode, data_len, runs,
-                                   TIMES_CSV_NAME_PATTERN_FMT)
-            comp = re.compile(NAME_PATTERN)
-            for _, filename in filenames[-runs:]:
-                filename = os.path.join(DATA_PATH, filename)
-                m = comp.search(filename)
-                assert(m is not None)
-                networks.add(m.group("network"))
-                sends = 0
-                receives = 0
-                with open(filename) as csvfile:
-                    reader = csv.DictReader(csvfile, delimiter=";")
-                    for row in reader:
-                        sends += 1
-                        if row["recv_time"]:
-                            receives += 1
-                    if (sends > 0):
-                        pdrs[data_len].append(100 * receives / sends)
-            pdrs[data_len] = _reject_outliers(pdrs[data_len])
-        means = np.array([np.mean(pdrs[s]) for s in DATA_LENS]) \
-            .astype(np.double)
+        means = pdr_means[o]
         means_mask = np.isfinite(means)
-        errs = np.array([np.std(pdrs[s]) for s in DATA_LENS])
+        errs = pdr_errs[o]
         index = np.arange(1, len(DATA_LENS) + 1)
         style = {}
         style["color"] = COLORS[mode]
         if means[means_mask].any():
-            plt.bar(index[means_mask] + (o * BAR_WIDTH) - (BAR_WIDTH / 2),
-                    means[means_mask], BAR_WIDTH, yerr=errs[means_mask],
-                    label=MODES_READABLE[mode], **style)
-    _plot_show_and_save(
-            networks,
+            ax.bar(index[means_mask] + (o * BAR_WIDTH) - (BAR_WIDTH / 2),
+                   means[means_mask], BAR_WIDTH, yerr=errs[means_mask],
+                   label=MODES_READABLE[mode], **style)
+    _plot_save(
+            fig, ax, networks,
             "pdr",
             "Reliability",
             "Average packet delivery rate [%]",
             runs,
             (0, 100)
         )
+    return fig
 
 
-def plot_lat(runs=RUNS):
-    plt.clf()
-    networks = set()
+def plot_lat(dataset, runs=RUNS):
+    fig, ax = plt.subplots()
+    networks, lat_means, lat_errs = lat_stats(dataset, runs)
     mode_legend_elements = []
     hops_legend_elements = []
     for o, mode in enumerate(MODES):
-        latencies = {s: [[] for _ in range(MAX_HOPS - 2)] for s in DATA_LENS}
-        for data_len in DATA_LENS:
-            filenames = _get_files(DELAY, mode, data_len, runs,
-                                   TIMES_CSV_NAME_PATTERN_FMT)
-            c = re.compile(NAME_PATTERN)
-            for _, filename in filenames[-runs:]:
-                filename = os.path.join(DATA_PATH, filename)
-                m = c.search(filename)
-                assert(m is not None)
-                networks.add(m.group("network"))
-                with open(filename) as csvfile:
-                    reader = csv.DictReader(csvfile, delimiter=";")
-                    for row in reader:
-                        if not len(row["recv_time"]):
-                            continue
-                        hops = int(row["hops_to_sink"]) - 2
-                        latencies[data_len][hops].append(
-                                1000 * (float(row["recv_time"]) -
-                                        float(row["send_time"]))
-                            )
-            for h in range(MAX_HOPS - 2):
-                latencies[data_len][h] = _reject_outliers(
-                    latencies[data_len][h]
-                )
         index = np.arange(1, len(DATA_LENS) + 1)
         style = {}
         style["edgecolor"] = None
@@ -155,19 +196,18 @@ def plot_lat(runs=RUNS):
                 hops_legend_elements.append(
                     Patch(label="{} hops".format(h + 2), **hops_legend_style)
                 )
-            means = np.array([np.mean(latencies[s][h]) for s in DATA_LENS]) \
-                .astype(np.double)
-            errs = np.array([np.std(latencies[s][h]) for s in DATA_LENS])
+            means = lat_means[o, :, h]
+            errs = lat_errs[o, :, h]
             means_mask = np.isfinite(means)
-            plt.bar(index[means_mask] + (o * BAR_WIDTH) - (BAR_WIDTH / 2),
-                    means[means_mask] - last_means[means_mask], BAR_WIDTH,
-                    yerr=errs[means_mask], bottom=last_means[means_mask],
-                    label="{} ({} hops)".format(MODES_READABLE[mode],
-                                                h + 2),
-                    **style)
+            ax.bar(index[means_mask] + (o * BAR_WIDTH) - (BAR_WIDTH / 2),
+                   means[means_mask] - last_means[means_mask], BAR_WIDTH,
+                   yerr=errs[means_mask], bottom=last_means[means_mask],
+                   label="{} ({} hops)".format(MODES_READABLE[mode],
+                                               h + 2),
+                   **style)
             last_means = means
-    _plot_show_and_save(
-        networks,
+    _plot_save(
+        fig, ax, networks,
         "lat",
         "Latency",
         "Source-to-sink latency [ms]",
@@ -179,10 +219,81 @@ def plot_lat(runs=RUNS):
             {"handles": hops_legend_elements, "loc": "upper left"},
         ]
     )
+    return fig
+
 
+def plot_lat_cdf(dataset, runs=RUNS):
+    hop_counts = MAX_HOPS - 2
+    fig, axs = plt.subplots(len(MODES), hop_counts, sharex=True, sharey=True,
+                            squeeze=False)
+    networks, sketches = latency_sketches(dataset, runs)
+    cmap = plt.get_cmap("viridis")
+    for o, mode in enumerate(MODES):
+        for h in range(hop_counts):
+            ax = axs[o, h]
+            for i, data_len in enumerate(DATA_LENS):
+                if (mode, data_len, h + 2) not in sketches:
+                    continue
+                values, fractions = sketches[mode, data_len, h + 2].cdf()
+                ax.step(1000 * values, fractions, where="post",
+                        color=cmap(i / (len(DATA_LENS) - 1)))
+            if o == 0:
+                ax.set_title("{} hops".format(h + 2))
+        axs[o, 0].set_ylabel(MODES_READABLE[mode])
+    axs[0, 0].set_xscale("log")
+    axs[0, 0].set_ylim(0, 1)
+    for ax in axs[-1]:
+        ax.set_xlabel("Latency [ms]")
+    mappable = ScalarMappable(norm=Normalize(1, len(DATA_LENS)), cmap=cmap)
+    mappable.set_array([])
+    cb = fig.colorbar(mappable, ax=axs)
+    if plt.rcParams["text.usetex"]:
+        cb.set_label(r"Fragments [\#]")
+    else:
+        fig.suptitle("Latency CDF")
+        cb.set_label("Fragments [#]")
+    fig.savefig(_plot_filename(networks, "lat_cdf"), **_savefig_opts(fig))
+    return fig
 
-def plot_l2_retrans(runs=RUNS):
-    plt.clf()
+
+def plot_lat_percentiles(dataset, runs=RUNS):
+    fig, axs = plt.subplots(1, len(LAT_PERCENTILES), sharey=True,
+                            squeeze=False)
+    networks, sketches = latency_sketches(dataset, runs)
+    index = np.arange(1, len(DATA_LENS) + 1)
+    mode_marker = {"fwd": "x", "reass": "+"}
+    hatch = [1.0, 0.8, 0.6, 0.4, 0.2]
+    for ax, percentile in zip(axs[0], LAT_PERCENTILES):
+        for mode in MODES:
+            for h in range(MAX_HOPS - 2):
+                values = np.array([
+                    1000 * sketches[mode, data_len, h + 2]
+                    .quantile(percentile / 100)
+                    if (mode, data_len, h + 2) in sketches else np.nan
+                    for data_len in DATA_LENS
+                ])
+                mask = np.isfinite(values)
+                ax.plot(index[mask], values[mask], color=COLORS[mode],
+                        alpha=hatch[h], marker=mode_marker[mode],
+                        label="{} ({} hops)".format(MODES_READABLE[mode],
+                                                    h + 2))
+        ax.set_title("{}th percentile".format(percentile))
+        ax.set_xlim(0.5, len(DATA_LENS) + .5)
+        ax.set_xticks(range(1, len(DATA_LENS) + 1, 2))
+        if plt.rcParams["text.usetex"]:
+            ax.set_xlabel(r"Fragments [\#]")
+        else:
+            ax.set_xlabel("Fragments [#]")
+    axs[0, 0].set_yscale("log")
+    axs[0, 0].set_ylabel("Source-to-sink latency [ms]")
+    axs[0, 0].legend(loc="upper left", ncol=2)
+    fig.savefig(_plot_filename(networks, "lat_percentiles"),
+                **_savefig_opts(fig))
+    return fig
+
+
+def plot_l2_retrans(dataset, runs=RUNS):
+    fig, ax = plt.subplots()
     offset = {
             "reass": -0.15,
             "fwd": 0.15,
@@ -190,81 +301,63 @@ def plot_l2_retrans(runs=RUNS):
     networks = set()
     mode_marker = {"fwd": "x", "reass": "+"}
     for mode in MODES:
-        l2_retrans = []
-        means = [[] for _ in DATA_LENS]
-        for i, data_len in enumerate(DATA_LENS, 1):
-            filenames = _get_files(DELAY, mode, data_len, runs,
-                                   STATS_CSV_NAME_PATTERN_FMT)
-            c = re.compile(NAME_PATTERN)
-            for _, filename in filenames[-runs:]:
-                filename = os.path.join(DATA_PATH, filename)
-                m = c.search(filename)
-                assert(m is not None)
-                networks.add(m.group("network"))
-                with open(filename) as csvfile:
-                    reader = csv.DictReader(csvfile, delimiter=";")
-                    for row in reader:
-                        l2_retrans.append((i, int(row["l2_retrans"] or 0)))
-            means[i - 1] = np.mean(
-                    [l[1] for l in l2_retrans if l[0] == i]
-                )
-        means = np.array(means)
+        l2_retrans = [[] for _ in DATA_LENS]
+        for i, data_len in enumerate(DATA_LENS):
+            for _, network, summary in dataset.runs("summary", mode,
+                                                    data_len, runs):
+                networks.add(network)
+                stats = summary["nodes"]
+                l2_retrans[i].append(np.where(
+                    stats["l2_retrans"] == parse_results.MISSING, 0,
+                    stats["l2_retrans"]
+                ))
+        x, y, means = _by_size(l2_retrans)
         means_mask = np.isfinite(means)
         index = np.arange(1, len(DATA_LENS) + 1)
         if plt.rcParams["text.usetex"]:
             markeropts = {"markersize": 5}
         else:
             markeropts = {"markersize": 10}
-        plt.plot(index[means_mask], means[means_mask],
-                 marker=mode_marker[mode],
-                 label=MODES_READABLE[mode],
-                 **markeropts)
-        plt.scatter([l[0] + offset[mode] for l in l2_retrans],
-                    [l[1] for l in l2_retrans],
-                    marker=mode_marker[mode], alpha=0.2)
-    ax = plt.gca()
+        ax.plot(index[means_mask], means[means_mask],
+                marker=mode_marker[mode],
+                label=MODES_READABLE[mode],
+                **markeropts)
+        ax.scatter(x + offset[mode], y, marker=mode_marker[mode],
+                   alpha=0.2)
     ax.set_yscale("symlog")
-    _plot_show_and_save(
-            networks,
+    _plot_save(
+            fig, ax, networks,
             "l2_retrans",
             "Link-layer retransmissions",
             "Failed transmissions [#]",
             runs,
             (0, 7000)
         )
+    return fig
 
 
-def plot_pktbuf(runs=RUNS):
-    plt.clf()
+def plot_pktbuf(dataset, runs=RUNS):
+    fig, ax = plt.subplots()
     networks = set()
     for o, mode in enumerate(MODES):
         pktbuf = {s: [] for s in DATA_LENS}
         for size in DATA_LENS:
-            filenames = _get_files(DELAY, mode, size, runs,
-                                   STATS_CSV_NAME_PATTERN_FMT)
-            c = re.compile(NAME_PATTERN)
-            for _, filename in filenames[-runs:]:
-                filename = os.path.join(DATA_PATH, filename)
-                m = c.search(filename)
-                assert(m is not None)
-                network = m.group("network")
+            for filename, network, summary in dataset.runs("summary", mode,
+                                                           size, runs):
                 networks.add(network)
-                sink = network.split("x")[0]
-                with open(filename) as csvfile:
-                    reader = csv.DictReader(csvfile, delimiter=";")
-                    for row in reader:
-                        if row["node"] != sink and \
-                           row["pktbuf_size"] != "" and \
-                           row["pktbuf_usage"] != "":
-                            pktbuf[size].append(
-                                    int(row["pktbuf_usage"]) /
-                                    int(row["pktbuf_size"]) * 100
-                                )
-                        elif row["pktbuf_size"] == "" or \
-                                row["pktbuf_usage"] == "":
-                            logging.warn("{}: Incomplete data set, packet "
-                                         "buffer data missing for {}"
-                                         .format(filename, row["node"]))
+                stats = summary["nodes"]
+                sink = parse_results.node_num(network.split("x")[0])
+                complete = (stats["pktbuf_size"] != parse_results.MISSING) & \
+                    (stats["pktbuf_usage"] != parse_results.MISSING)
+                for node in stats["node"][~complete]:
+                    logging.warn("{}: Incomplete data set, packet "
+                                 "buffer data missing for m3-{}"
+                                 .format(filename, node))
+                stats = stats[complete & (stats["node"] != sink)]
+                pktbuf[size].extend(
+                    (stats["pktbuf_usage"] / stats["pktbuf_size"] * 100)
+                    .tolist()
+                )
         means = np.array([np.mean(pktbuf[s]) for s in DATA_LENS]) \
             .astype(np.double)
         means_mask = np.isfinite(means)
@@ -273,21 +366,22 @@ def plot_pktbuf(runs=RUNS):
         style = {}
         style["color"] = COLORS[mode]
         if means[means_mask].any():
-            plt.bar(index[means_mask] + (o * BAR_WIDTH) - (BAR_WIDTH / 2),
-                    means[means_mask], BAR_WIDTH, yerr=errs[means_mask],
-                    label=MODES_READABLE[mode], **style)
-    _plot_show_and_save(
-            networks,
+            ax.bar(index[means_mask] + (o * BAR_WIDTH) - (BAR_WIDTH / 2),
+                   means[means_mask], BAR_WIDTH, yerr=errs[means_mask],
+                   label=MODES_READABLE[mode], **style)
+    _plot_save(
+            fig, ax, networks,
             "pktbuf",
             "Packet buffer usage",
             "Max. packet buffer usage [%]",
             runs,
             (0, 100)
         )
+    return fig
 
 
-def plot_rbuf_full(runs=RUNS):
-    plt.clf()
+def plot_rbuf_full(dataset, runs=RUNS):
+    fig, ax = plt.subplots()
     offset = {
             "reass": -0.2,
             "fwd": 0,
@@ -296,115 +390,86 @@ def plot_rbuf_full(runs=RUNS):
     networks = set()
     mode_marker = {"fwd": "x", "reass": "+", "fwd_vrb": "v"}
     for mode in MODES:
-        rbuf_full = []
-        vrb_full = []
-        rbuf_full_m = [[] for _ in DATA_LENS]
-        vrb_full_m = [[] for _ in DATA_LENS]
-        for i, size in enumerate(DATA_LENS, 1):
-            filenames = _get_files(DELAY, mode, size, runs,
-                                   STATS_CSV_NAME_PATTERN_FMT)
-            c = re.compile(NAME_PATTERN)
-            for _, filename in filenames[-runs:]:
-                filename = os.path.join(DATA_PATH, filename)
-                m = c.search(filename)
-                assert(m is not None)
-                network = m.group("network")
+        rbuf_full = [[] for _ in DATA_LENS]
+        vrb_full = [[] for _ in DATA_LENS]
+        for i, size in enumerate(DATA_LENS):
+            for filename, network, summary in dataset.runs("summary", mode,
+                                                           size, runs):
                 networks.add(network)
-                sink = network.split("x")[0]
-                with open(filename) as csvfile:
-                    reader = csv.DictReader(csvfile, delimiter=";")
-                    for row in reader:
-                        if row["node"] != sink:
-                            if row["rbuf_full"] != "":
-                                rbuf_full.append(
-                                        (i, int(row["rbuf_full"]))
-                                    )
-                            else:
-                                logging.warn("{}: Incomplete data set, "
-                                             "reassembly buffer data "
-                                             "missing for {}"
-                                             .format(filename,
-                                                     row["node"]))
-                            if mode != "reass" and \
-                               row["vrb_full"] != "":
-                                vrb_full.append(
-                                        (i, int(row["vrb_full"]))
-                                    )
-                            elif mode != "reass" and row["vrb_full"] == "":
-                                logging.warn("{}: Incomplete data set, "
-                                             "VRB data missing for {}"
-                                             .format(filename,
-                                                     row["node"]))
-            rbuf_full_m[i - 1] = np.mean(
-                    [e[1] for e in rbuf_full if e[0] == i]
-                )
-            vrb_full_m[i - 1] = np.mean(
-                    [e[1] for e in vrb_full if e[0] == i]
-                )
-        means = np.array(rbuf_full_m)
+                stats = summary["nodes"]
+                sink = parse_results.node_num(network.split("x")[0])
+                stats = stats[stats["node"] != sink]
+                missing = stats["rbuf_full"] == parse_results.MISSING
+                for node in stats["node"][missing]:
+                    logging.warn("{}: Incomplete data set, reassembly "
+                                 "buffer data missing for m3-{}"
+                                 .format(filename, node))
+                rbuf_full[i].append(stats["rbuf_full"][~missing])
+                if mode != "reass":
+                    missing = stats["vrb_full"] == parse_results.MISSING
+                    for node in stats["node"][missing]:
+                        logging.warn("{}: Incomplete data set, VRB data "
+                                     "missing for m3-{}"
+                                     .format(filename, node))
+                    vrb_full[i].append(stats["vrb_full"][~missing])
+        x, y, means = _by_size(rbuf_full)
         means_mask = np.isfinite(means)
         index = np.arange(1, len(DATA_LENS) + 1)
         if plt.rcParams["text.usetex"]:
             markeropts = {"markersize": 5}
         else:
             markeropts = {"markersize": 10}
-        plt.plot(index[means_mask], means[means_mask],
-                 marker=mode_marker[mode], label=MODES_READABLE[mode],
-                 **markeropts)
-        plt.scatter([e[0] + offset[mode] for e in rbuf_full],
-                    [e[1] for e in rbuf_full],
-                    marker=mode_marker[mode], alpha=0.2)
+        ax.plot(index[means_mask], means[means_mask],
+                marker=mode_marker[mode], label=MODES_READABLE[mode],
+                **markeropts)
+        ax.scatter(x + offset[mode], y, marker=mode_marker[mode],
+                   alpha=0.2)
         if mode != "reass":
-            means = np.array(vrb_full_m)
+            x, y, means = _by_size(vrb_full)
             means_mask = np.isfinite(means)
             tmp = "{}_vrb".format(mode)
-            plt.plot(index[means_mask], means[means_mask],
-                     marker=mode_marker[tmp],
-                     label="{} (VRB)".format(MODES_READABLE[mode]),
-                     **markeropts)
-            plt.scatter([e[0] + offset[tmp] for e in vrb_full],
-                        [e[1] for e in vrb_full],
-                        marker=mode_marker[tmp], alpha=0.1)
-    ax = plt.gca()
+            ax.plot(index[means_mask], means[means_mask],
+                    marker=mode_marker[tmp],
+                    label="{} (VRB)".format(MODES_READABLE[mode]),
+                    **markeropts)
+            ax.scatter(x + offset[tmp], y, marker=mode_marker[tmp],
+                       alpha=0.1)
     ax.set_yscale("symlog")
-    _plot_show_and_save(
-        networks,
+    _plot_save(
+        fig, ax, networks,
         "rbuf_full",
         "Reassembly buffer",
         "Filled reassembly buffer events [#]",
         runs,
         (0, 7000)
     )
+    return fig
 
 
-def plot_rbuf_full_vs_pktbuf(runs=RUNS):
-    plt.clf()
+def plot_rbuf_full_vs_pktbuf(dataset, runs=RUNS):
+    fig, ax = plt.subplots()
     mode = "fwd"
     networks = set()
     rbuf_full = []
     pktbuf = []
     for i, data_len in enumerate(DATA_LENS, 1):
-        filenames = _get_files(DELAY, mode, data_len, runs,
-                               STATS_CSV_NAME_PATTERN_FMT)
-        c = re.compile(NAME_PATTERN)
-        for _, filename in filenames[-runs:]:
-            filename = os.path.join(DATA_PATH, filename)
-            m = c.search(filename)
-            assert(m is not None)
-            network = m.group("network")
+        for _, network, summary in dataset.runs("summary", mode, data_len,
+                                                runs):
             networks.add(network)
-            sink = network.split("x")[0]
-            with open(filename) as csvfile:
-                reader = csv.DictReader(csvfile, delimiter=";")
-                for row in reader:
-                    if row["node"] != sink:
-                        rbuf_full.append(int(row["rbuf_full"] or 0))
-                        if all(row[col] != "" for col
-                                in ["pktbuf_usage", "pktbuf_size"]):
-                            pktbuf.append(100 * int(row["pktbuf_usage"]) /
-                                          int(row["pktbuf_size"]))
-                        else:
-                            pktbuf.append(np.nan)
+            stats = summary["nodes"]
+            sink = parse_results.node_num(network.split("x")[0])
+            stats = stats[stats["node"] != sink]
+            rbuf_full.extend(np.where(
+                stats["rbuf_full"] == parse_results.MISSING, 0,
+                stats["rbuf_full"]
+            ).tolist())
+            complete = (stats["pktbuf_size"] != parse_results.MISSING) & \
+                (stats["pktbuf_usage"] != parse_results.MISSING)
+            pktbuf.extend(np.where(
+                complete,
+                100 * stats["pktbuf_usage"] / stats["pktbuf_size"],
+                np.nan
+            ).tolist())
     rbuf_full = np.array(rbuf_full)
     pktbuf = np.array(pktbuf)
     base = rgb_to_hsv(to_rgba("#ff9800")[:3])
@@ -413,83 +478,333 @@ def plot_rbuf_full_vs_pktbuf(runs=RUNS):
              for i in range(256)]
         )
     cmap = ListedColormap(colors)
-    hb = plt.hexbin(rbuf_full, pktbuf, cmap=cmap,
-                    bins="log", gridsize=25, label=MODES_READABLE[mode])
+    hb = ax.hexbin(rbuf_full, pktbuf, cmap=cmap,
+                   bins="log", gridsize=25, label=MODES_READABLE[mode])
     rbuf_full = np.sort(rbuf_full)
-    plt.ylim((0, 100))
-    plt.xlim(left=0)
+    ax.set_ylim((0, 100))
+    ax.set_xlim(left=0)
     xlabel = "Filled reassembly buffer events [#]"
     ylabel = "Max. packet buffer usage [%]"
     if plt.rcParams["text.usetex"]:
         xlabel = xlabel.replace("#", r"\#")
         ylabel = ylabel.replace("%", r"\%")
-    plt.xlabel(xlabel)
-    plt.ylabel(ylabel)
-    ax = plt.gca()
-    fig = plt.gcf()
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
     cb = fig.colorbar(hb, ax=ax)
     cb.set_label('Multiplicity of coinciding events')
-    filename = "{}.{}.{}".format(
-            os.path.join(DATA_PATH, ",".join(networks)),
-            "rbuf_full_vs_pktbuf",
-            "pgf" if plt.rcParams["text.usetex"] else "svg"
-        )
-    _savefig(filename)
-    plt.show()
+    _savefig(fig, ax, _plot_filename(networks, "rbuf_full_vs_pktbuf"))
+    return fig
 
 
 def _exp_dict(delay, mode, data_len):
     return locals()
 
 
-def _get_files(delay, mode, data_len, runs, pattern):
-    exp_dict = _exp_dict(delay, mode, data_len)
-    pattern = pattern.format(**exp_dict)
-    filenames = filter(lambda x: x[0] is not None,
-                       map(lambda f: (re.match(pattern, f), f),
-                           os.listdir(DATA_PATH)))
-    filenames = sorted(filenames,
-                       key=lambda x: int(x[0].group("timestamp")))
-    if (len(filenames) < runs) and (len(filenames) > 0):
+def _warn_missing_runs(exp_dict, found, runs):
+    if (found < runs) and (found > 0):
         logging.warning(
             "m{mode}__r{data_len}Bx{delay}ms only has {runs} of "
             "{total_runs} expected runs"
-            .format(runs=len(filenames), total_runs=runs, **exp_dict)
+            .format(runs=found, total_runs=runs, **exp_dict)
+        )
+
+
+def _index_files(data_path):
+    """
+    Indexes the files of all runs in `data_path` by (kind, mode, data_len,
+    delay), e.g. ("times.csv", "fwd", 16, 10000). Each entry is a list of
+    file names and their parsed name components, sorted by timestamp.
+    """
+    c = re.compile(RESULT_NAME_PATTERN)
+    index = {}
+    for filename in os.listdir(data_path):
+        m = c.match(filename)
+        if m is None:
+            continue
+        info = m.groupdict()
+        for key in RESULT_NAME_INTS:
+            info[key] = int(info[key])
+        key = info["kind"], info["mode"], info["data_len"], info["delay"]
+        index.setdefault(key, []).append((filename, info))
+    for files in index.values():
+        files.sort(key=lambda f: f[1]["timestamp"])
+    return index
+
+
+class Dataset(object):
+    """
+    The experiment runs in `data_path` or, if `db` is given, in the results
+    database `db` (see `parse_results.open_db()`).
+
+    The times, stats, and summary of each run are loaded on first use and
+    shared by all plots afterwards, so every file is only read once.
+    """
+    def __init__(self, data_path=DATA_PATH, db=None, delay=DELAY):
+        self.data_path = data_path
+        self.db = db
+        self.delay = delay
+        # file index of data_path, see files()
+        self._index = None
+        # runs queried from db by (mode, data_len, runs)
+        self._db_runs = {}
+        # files (or runs in db) by (mode, data_len) at the last refresh()
+        self._signatures = {}
+        # already reported missing runs, see files()
+        self._warned = set()
+        # loaded data by (kind, file or run), with the (mtime, size) of the
+        # file or the (name, log_sha1, parser_version) of the run in the
+        # database when it was loaded
+        self._loaded = {}
+
+    def _load(self, kind, key, version, load, *args):
+        key = kind, key
+        if key not in self._loaded or self._loaded[key][0] != version:
+            res = load(*args)
+            # the arrays are shared between plots, so protect them from
+            # in-place modification
+            if kind == "summary":
+                res["nodes"].flags.writeable = False
+            else:
+                res.flags.writeable = False
+            self._loaded[key] = version, res
+        return self._loaded[key][1]
+
+    def _load_file(self, kind, filename, load=None, *args):
+        stat = os.stat(filename)
+        if load is None:
+            load = FILE_LOADERS[kind]
+            args = (filename,)
+        return self._load(kind, os.path.realpath(filename),
+                          (stat.st_mtime_ns, stat.st_size), load, *args)
+
+    def _summarize_files(self, times_csvname, stats_csvname):
+        return parse_results.summarize_run(
+            self._load_file("times", times_csvname),
+            self._load_file("stats", stats_csvname)
         )
-    return filenames
 
+    def _load_run_files(self, kind, times_csvname):
+        base, ext = times_csvname.rsplit(".times.csv", 1)
+        stats_csvname = "{}.stats.csv{}".format(base, ext)
+        if kind == "times":
+            return times_csvname, self._load_file(kind, times_csvname)
+        elif kind == "stats":
+            return stats_csvname, self._load_file(kind, stats_csvname)
+        summaryname = "{}.summary.json".format(base)
+        if os.path.exists(summaryname):
+            return summaryname, self._load_file(kind, summaryname)
+        # converted by an older parse_results.py without summaries
+        return times_csvname, self._load_file(kind, times_csvname,
+                                              self._summarize_files,
+                                              times_csvname, stats_csvname)
 
-def _reject_outliers(data, m=2):
-    d = np.abs(data - np.median(data))
-    mdev = np.median(d)
-    s = d / mdev if mdev else 0.
-    data = np.array(data)
-    return data[s < m]
+    def _load_db_run(self, kind, run_id):
+        if kind == "summary":
+            return parse_results.summarize_run(
+                parse_results.db_load_times(self.db, run_id),
+                parse_results.db_load_stats(self.db, run_id)
+            )
+        elif kind == "times":
+            return parse_results.db_load_times(self.db, run_id)
+        return parse_results.db_load_stats(self.db, run_id)
 
+    def _runs_from_db(self, kind, mode, data_len, runs):
+        key = mode, data_len, runs
+        if key not in self._db_runs:
+            self._db_runs[key] = self.db.execute(
+                "SELECT id, name, network, log_sha1, parser_version "
+                "FROM runs "
+                "WHERE mode = ? AND data_len = ? AND delay = ? "
+                "ORDER BY timestamp DESC LIMIT ?",
+                (mode, data_len, self.delay, runs)
+            ).fetchall()
+        rows = self._db_runs[key]
+        _warn_missing_runs(_exp_dict(self.delay, mode, data_len), len(rows),
+                           runs)
+        for run_id, name, network, log_sha1, parser_version in \
+                reversed(rows):
+            # SQLite may reuse the id of a deleted run, so the id alone does
+            # not identify the data loaded for it
+            yield name, network, self._load(
+                kind, run_id, (name, log_sha1, parser_version),
+                self._load_db_run, kind, run_id
+            )
 
-def _plot_show_and_save(networks, plotname, title, ylabel, runs,
-                        ylim=None, legends=None):
-    plt.xlim(0.5, len(DATA_LENS) + .5)
+    def files(self, kind, mode, data_len, runs=RUNS):
+        """
+        Returns file names and parsed name components (see
+        RESULT_NAME_PATTERN) of the last `runs` files of `kind` (e.g.
+        "times.csv") with `mode` and `data_len`.
+
+        The directory is only listed on the first call.
+        """
+        if self._index is None:
+            self._index = _index_files(self.data_path)
+        files = self._index.get((kind, mode, data_len, self.delay), [])
+        if (mode, data_len, len(files), runs) not in self._warned:
+            self._warned.add((mode, data_len, len(files), runs))
+            _warn_missing_runs(_exp_dict(self.delay, mode, data_len),
+                               len(files), runs)
+        return files[-runs:]
+
+    def runs(self, kind, mode, data_len, runs=RUNS):
+        """
+        Yields name, network, and data of the last `runs` runs with `mode`
+        and `data_len`. Depending on `kind`, the data are the packets
+        ("times", see `parse_results.load_times()`), the node statistics
+        ("stats", see `parse_results.load_stats()`), or the summary of the
+        run ("summary", see `parse_results.summarize_run()`).
+        """
+        if self.db is not None:
+            yield from self._runs_from_db(kind, mode, data_len, runs)
+            return
+        for filename, info in self.files("times.csv", mode, data_len, runs):
+            name, data = self._load_run_files(
+                kind, os.path.join(self.data_path, filename)
+            )
+            yield name, info["network"], data
+
+    def _run_signatures(self):
+        res = {}
+        if self.db is not None:
+            for mode, data_len, run_id, log_sha1 in self.db.execute(
+                "SELECT mode, data_len, id, log_sha1 FROM runs "
+                "WHERE delay = ?", (self.delay,)
+            ):
+                res.setdefault((mode, data_len), set()).add((run_id,
+                                                             log_sha1))
+            return res
+        self._index = _index_files(self.data_path)
+        for (kind, mode, data_len, delay), files in self._index.items():
+            if delay != self.delay or \
+               kind not in ["times.csv", "stats.csv", "summary.json"]:
+                continue
+            for filename, _ in files:
+                try:
+                    stat = os.stat(os.path.join(self.data_path, filename))
+                except FileNotFoundError:
+                    continue
+                res.setdefault((mode, data_len), set()).add(
+                    (filename, stat.st_mtime_ns, stat.st_size)
+                )
+        return res
+
+    def refresh(self):
+        """
+        Looks for new, changed, or removed runs since the last refresh and
+        returns their (mode, data_len). Runs that did not change are not
+        loaded again.
+        """
+        self._db_runs = {}
+        signatures = self._run_signatures()
+        changed = set(
+            key for key in set(signatures) | set(self._signatures)
+            if signatures.get(key) != self._signatures.get(key)
+        )
+        self._signatures = signatures
+        return changed
+
+    def preload(self, runs=RUNS, kinds=("summary",)):
+        """
+        Loads the data of `kinds` (see `runs()`) of the last `runs` runs of
+        all modes and data lengths.
+        """
+        for kind in kinds:
+            for mode, data_len in _groups():
+                for _ in self.runs(kind, mode, data_len, runs):
+                    pass
+
+
+def _by_size(values):
+    """
+    Takes a list of per-run value arrays for each data length in DATA_LENS.
+    Returns x (the 1-based index of the data length), and y (the value) of
+    all values, and the mean for each data length (NaN if it has no values).
+    """
+    values = [np.concatenate(v) if v else np.empty(0) for v in values]
+    counts = np.array([len(v) for v in values])
+    x = np.repeat(np.arange(1, len(values) + 1), counts)
+    y = np.concatenate(values) if values else np.empty(0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.bincount(x, y, len(values) + 1)[1:] / counts
+    return x, y, means
+
+
+def _groups():
+    # (mode, data_len) in the order of the group numbers of _group_stats()
+    return ((mode, data_len) for mode in MODES for data_len in DATA_LENS)
+
+
+def _sorted_group_medians(data, counts):
+    # data is sorted by group and by value within the groups
+    starts = np.cumsum(counts) - counts
+    nonempty = counts > 0
+    res = np.full(len(counts), np.nan)
+    low = starts[nonempty] + (counts[nonempty] - 1) // 2
+    high = starts[nonempty] + counts[nonempty] // 2
+    res[nonempty] = (data[low] + data[high]) / 2
+    return res
+
+
+def _reject_outliers(data, groups, ngroups, m=2):
+    """
+    Returns a mask of the values in `data` that are less than `m` median
+    absolute deviations away from the median of their group. `groups` holds
+    the group number (0 to `ngroups` - 1) of each value.
+    """
+    counts = np.bincount(groups, minlength=ngroups)
+    order = np.lexsort((data, groups))
+    median = _sorted_group_medians(data[order], counts)
+    d = np.abs(data - median[groups])
+    order = np.lexsort((d, groups))
+    mdev = _sorted_group_medians(d[order], counts)[groups]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.where(mdev != 0, d / mdev, 0.)
+    return s < m
+
+
+def _group_stats(groups, data, ngroups):
+    """
+    Returns mean and standard deviation of `data` for each group, after
+    rejecting outliers within the groups (see `_reject_outliers()`). Empty
+    groups have NaN as mean and standard deviation.
+    """
+    keep = _reject_outliers(data, groups, ngroups)
+    groups = groups[keep]
+    data = data[keep]
+    counts = np.bincount(groups, minlength=ngroups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.bincount(groups, data, ngroups) / counts
+        errs = np.sqrt(
+            np.bincount(groups, (data - means[groups]) ** 2, ngroups) /
+            counts
+        )
+    return means, errs
+
+
+def _plot_save(fig, ax, networks, plotname, title, ylabel, runs,
+               ylim=None, legends=None):
+    ax.set_xlim(0.5, len(DATA_LENS) + .5)
     if ylim is not None:
         if issubclass(type(ylim), dict):
-            plt.ylim(**ylim)
+            ax.set_ylim(**ylim)
         else:
-            plt.ylim(*ylim)
-    plt.xticks(range(1, len(DATA_LENS) + 1))
+            ax.set_ylim(*ylim)
+    ax.set_xticks(range(1, len(DATA_LENS) + 1))
     if plt.rcParams["text.usetex"]:
-        plt.xlabel(r"Fragments [\#]")
-        plt.ylabel(ylabel.replace("%", r"\%"))
-        plt.ylabel(ylabel.replace("#", r"\#"))
+        ax.set_xlabel(r"Fragments [\#]")
+        ax.set_ylabel(ylabel.replace("%", r"\%"))
+        ax.set_ylabel(ylabel.replace("#", r"\#"))
     else:
-        plt.title(title)
-        plt.xlabel("Fragments [#]")
-        plt.ylabel(ylabel)
+        ax.set_title(title)
+        ax.set_xlabel("Fragments [#]")
+        ax.set_ylabel(ylabel)
     if legends:
         legs = []
         for l in legends:
-            legs.append(plt.legend(**l))
+            legs.append(ax.legend(**l))
         for l in legs[:-1]:
-            plt.gca().add_artist(l)
+            ax.add_artist(l)
     else:
         legend_params = {}
         if plotname == "pdr":
@@ -500,21 +815,29 @@ def _plot_show_and_save(networks, plotname, title, ylabel, runs,
             legend_params["loc"] = "upper left"
         if plotname == "lat":
             legend_params["ncol"] = 2
-        plt.legend(**legend_params)
-    filename = "{}.{}.{}".format(
+        ax.legend(**legend_params)
+    _savefig(fig, ax, _plot_filename(networks, plotname))
+
+
+def _plot_filename(networks, plotname):
+    return "{}.{}.{}".format(
             os.path.join(DATA_PATH, ",".join(networks)),
             plotname, "pgf" if plt.rcParams["text.usetex"] else "svg"
         )
-    _savefig(filename)
-    plt.show()
 
 
-def _savefig(filename):
-    if "figsize" in SAVEFIG_OPTS:
-        fig = plt.gcf()
-        fig.set_size_inches(*SAVEFIG_OPTS["figsize"])
-    plt.margins(0)
-    plt.savefig(filename, **SAVEFIG_OPTS)
+def _savefig_opts(fig):
+    # figsize is not a savefig() option, but applied to the figure
+    opts = dict(SAVEFIG_OPTS)
+    if "figsize" in opts:
+        fig.set_size_inches(*opts.pop("figsize"))
+    return opts
+
+
+def _savefig(fig, ax, filename):
+    opts = _savefig_opts(fig)
+    ax.margins(0)
+    fig.savefig(filename, **opts)
 
 
 def _configure_plot(pgf=False, figsize=100):
@@ -525,7 +848,7 @@ def _configure_plot(pgf=False, figsize=100):
         SAVEFIG_OPTS["figsize"] = (3.27835 * (figsize / 100),
                                    1.84409 * (figsize / 100))
         matplotlib.use("pgf")
-        plt.subplots_adjust(0, 0)
+        plt.rc("figure.subplot", left=0, bottom=0)
         plt.rc("text", usetex=True)
         plt.rc("errorbar", capsize=2)
         plt.rc("font", family="serif", size=normalsize)
@@ -548,28 +871,123 @@ def _configure_plot(pgf=False, figsize=100):
         ])
 
 
-def _check_logs():
-    comp = re.compile(parse_results.LOG_NAME_PATTERN)
-    for logname in os.listdir(DATA_PATH):
-        match = comp.match(logname)
-        if match is not None:
-            logname = os.path.join(DATA_PATH, logname)
-            if os.path.exists(parse_results.times_csvname(logname)) and \
-               os.path.exists(parse_results.stats_csvname(logname)):
-                # don't redo existing logs
-                continue
-            parse_results.log_to_csvs(logname, data_path=DATA_PATH,
-                                      **parse_results.match_to_dict(match))
+def _check_logs(jobs=1, db=None):
+    # only (re-)convert logs that changed since their last conversion
+    parse_results.logs_to_csvs(DATA_PATH, jobs, incremental=True, db=db)
+
+
+def _write_dashboard(results, interval):
+    plots = []
+    for result in results:
+        filenames = [f for f in os.listdir(DATA_PATH)
+                     if f.endswith(".{}.svg".format(result))]
+        if not filenames:
+            continue
+        filename = max(filenames, key=lambda f: os.path.getmtime(
+            os.path.join(DATA_PATH, f)
+        ))
+        mtime = os.path.getmtime(os.path.join(DATA_PATH, filename))
+        plots.append(
+            '<h2>{}</h2>\n<img src="{}?{:.0f}" alt="{}">'
+            .format(result, filename, mtime, result)
+        )
+    dashboard = os.path.join(DATA_PATH, DASHBOARD_NAME)
+    tmpname = "{}.{}".format(dashboard, os.getpid())
+    with open(tmpname, "w") as dashboard_file:
+        dashboard_file.write(
+            '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+            '<meta http-equiv="refresh" content="{}">\n'
+            '<title>Results</title>\n</head>\n<body>\n'
+            '<p>Last update: {}</p>\n{}\n</body>\n</html>\n'
+            .format(interval, time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "\n".join(plots))
+        )
+    os.replace(tmpname, dashboard)
+
+
+def watch(dataset, results, runs=RUNS, interval=DEFAULT_WATCH_INTERVAL,
+          jobs=1, plot_jobs=1, db=None):
+    """
+    Converts new logs and re-renders the plots `results` affected by new or
+    changed runs every `interval` seconds, until interrupted. Runs loaded
+    before are not loaded again. Without PGF output, the plots are also
+    shown in the dashboard DASHBOARD_NAME in DATA_PATH, which reloads every
+    `interval` seconds in the browser.
+    """
+    while True:
+        _check_logs(jobs, db)
+        changed = dataset.refresh()
+        affected = [result for result in results
+                    if changed & _plot_groups(result)]
+        if affected:
+            logging.info("Rendering {}".format(", ".join(affected)))
+            if plot_jobs == 1:
+                for result in affected:
+                    plt.close(PLOT_FUNCTIONS[result](dataset, runs=runs))
+            else:
+                render_plots(dataset, affected, runs, plot_jobs)
+            if not plt.rcParams["text.usetex"]:
+                _write_dashboard(results, interval)
+        time.sleep(interval)
 
 
 PLOT_FUNCTIONS = {
     "pdr": plot_pdr,
     "lat": plot_lat,
+    "lat_cdf": plot_lat_cdf,
+    "lat_percentiles": plot_lat_percentiles,
     "l2_retrans": plot_l2_retrans,
     "pktbuf": plot_pktbuf,
     "rbuf_full": plot_rbuf_full,
     "rbuf_full_vs_pktbuf": plot_rbuf_full_vs_pktbuf,
 }
+# modes of the runs plotted, if not all MODES
+PLOT_MODES = {
+    "rbuf_full_vs_pktbuf": ["fwd"],
+}
+# data of the runs plotted (see Dataset.runs()), if not only the summaries
+PLOT_KINDS = {
+    "lat": ["times"],
+}
+
+
+def _plot_groups(result):
+    # (mode, data_len) of the runs plotted by result
+    return set((mode, data_len) for mode in PLOT_MODES.get(result, MODES)
+               for data_len in DATA_LENS)
+
+
+def _init_render_worker(dataset):
+    global _RENDER_DATASET
+
+    _RENDER_DATASET = dataset
+    if not plt.rcParams["text.usetex"]:
+        # never open windows from the worker processes
+        plt.switch_backend("agg")
+
+
+def _render_worker(args):
+    result, runs = args
+    plt.close(PLOT_FUNCTIONS[result](_RENDER_DATASET, runs))
+    return result
+
+
+def render_plots(dataset, results, runs=RUNS, jobs=1):
+    """
+    Renders and saves the plots `results` (see PLOT_FUNCTIONS) in `jobs`
+    processes (0 for one per CPU).
+
+    The dataset is loaded before the processes are forked, so they share
+    it.
+    """
+    dataset.preload(runs, set(kind for result in results
+                              for kind in PLOT_KINDS.get(result, ["summary"])))
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(jobs or None, initializer=_init_render_worker,
+                  initargs=(dataset,)) as pool:
+        for result in pool.imap_unordered(_render_worker,
+                                          [(r, runs) for r in results]):
+            logging.info("Rendered {}".format(result))
 
 
 def main():
@@ -583,17 +1001,62 @@ def main():
     parser.add_argument("-f", "--figsize", nargs="?", default=100, type=int,
                         help="With --pgf: size of the figure in percent, "
                              "ignored without --pgf (default: 100%%)")
+    parser.add_argument("-j", "--jobs", default=1, type=int,
+                        help="Number of logs to convert to CSVs in parallel, "
+                             "0 for one per CPU (default: 1)")
+    parser.add_argument("-P", "--plot-jobs", default=1, type=int,
+                        help="Number of plots to render in parallel, 0 for "
+                             "one per CPU. With more than one, the plots are "
+                             "only saved, not shown (default: 1)")
+    parser.add_argument("-d", "--db", action="store_true",
+                        help="Plot from an SQLite results database instead "
+                             "of the CSVs, see --db-path")
+    parser.add_argument("--db-path",
+                        default=os.path.join(DATA_PATH,
+                                             parse_results.RESULTS_DB_NAME),
+                        help="SQLite results database for --db (default: "
+                             "{} in DATA_PATH)"
+                             .format(parse_results.RESULTS_DB_NAME))
+    parser.add_argument("-w", "--watch", action="store_true",
+                        help="Watch DATA_PATH for new runs and re-render the "
+                             "affected plots without showing them, see {} in "
+                             "DATA_PATH".format(DASHBOARD_NAME))
+    parser.add_argument("--watch-interval", default=DEFAULT_WATCH_INTERVAL,
+                        type=int,
+                        help="With --watch: seconds between checks for new "
+                             "runs (default: {})"
+                             .format(DEFAULT_WATCH_INTERVAL))
     parser.add_argument("result", nargs="*", help="Results to plot "
                         "(default: {})".format(
                             ' '.join(sorted(PLOT_FUNCTIONS.keys()))
                         ), choices=list(PLOT_FUNCTIONS.keys()).append([]))
     args = parser.parse_args()
+    db = args.db_path if args.db else None
     if not args.result:
         args.result = sorted(PLOT_FUNCTIONS.keys())
     _configure_plot(args.pgf, args.figsize)
-    _check_logs()
-    for result in args.result:
-        PLOT_FUNCTIONS[result](runs=args.runs)
+    if args.watch and not args.pgf:
+        plt.switch_backend("agg")
+    if not args.watch:
+        # watch() converts new logs itself
+        _check_logs(args.jobs, db)
+    if db is None:
+        dataset = Dataset()
+    else:
+        dataset = Dataset(db=parse_results.open_db(db))
+    if args.watch:
+        try:
+            watch(dataset, args.result, args.runs, args.watch_interval,
+                  args.jobs, args.plot_jobs, db)
+        except KeyboardInterrupt:
+            pass
+    elif args.plot_jobs == 1:
+        for result in args.result:
+            fig = PLOT_FUNCTIONS[result](dataset, runs=args.runs)
+            plt.show()
+            plt.close(fig)
+    else:
+        render_plots(dataset, args.result, args.runs, args.plot_jobs)
 
 
 if __name__ == "__main__":
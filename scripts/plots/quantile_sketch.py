@@ -0,0 +1,138 @@
+# Copyright (C) 2019 Freie Universität Berlin
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+import math
+
+import numpy as np
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2019 Freie Universität Berlin"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+DEFAULT_ALPHA = 0.005
+# values up to this are counted as 0
+MIN_VALUE = 1e-9
+
+
+class QuantileSketch(object):
+    """
+    Mergeable quantile sketch with relative accuracy `alpha` (see DDSketch,
+    Masson et al., VLDB 2019).
+
+    Values are counted in logarithmically sized bins, so any quantile is
+    returned with a relative error of at most `alpha` while the size of the
+    sketch only depends on the range of the values. Sketches with the same
+    `alpha` are merged by adding up their bins.
+
+    >>> s = QuantileSketch(0.01)
+    >>> s.add(np.arange(1, 101))
+    >>> bool(abs(s.quantile(0.5) - 50) <= 0.01 * 50)
+    True
+    >>> t = QuantileSketch(0.01)
+    >>> t.add([0, 1000])
+    >>> s.merge(t)
+    >>> s.count, float(s.quantile(0)), bool(abs(s.quantile(1) - 1000) <= 10)
+    (102, 0.0, True)
+    """
+    def __init__(self, alpha=DEFAULT_ALPHA):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.zeros = 0
+        # counts[i] is the number of values in
+        # (gamma ** (offset + i - 1), gamma ** (offset + i)]
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    @property
+    def count(self):
+        return self.zeros + int(self.counts.sum())
+
+    def _add_counts(self, offset, counts):
+        if len(counts) == 0:
+            return
+        if len(self.counts) == 0:
+            self.offset = offset
+            self.counts = np.array(counts, dtype=np.int64)
+            return
+        start = min(self.offset, offset)
+        end = max(self.offset + len(self.counts), offset + len(counts))
+        res = np.zeros(end - start, dtype=np.int64)
+        res[self.offset - start:self.offset - start + len(self.counts)] += \
+            self.counts
+        res[offset - start:offset - start + len(counts)] += counts
+        self.offset = start
+        self.counts = res
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.double).ravel()
+        values = values[~np.isnan(values)]
+        zeros = values <= MIN_VALUE
+        self.zeros += int(np.count_nonzero(zeros))
+        if zeros.all():
+            return
+        index = np.ceil(np.log(values[~zeros]) / math.log(self.gamma)) \
+            .astype(np.int64)
+        offset = int(index.min())
+        self._add_counts(offset, np.bincount(index - offset))
+
+    def merge(self, other):
+        if other.alpha != self.alpha:
+            raise ValueError("Can not merge sketches of different accuracy")
+        self.zeros += other.zeros
+        self._add_counts(other.offset, other.counts)
+
+    def bins(self):
+        """
+        Returns the values representing the non-empty bins (in ascending
+        order) and the number of values in them.
+        """
+        nonempty = np.flatnonzero(self.counts)
+        values = 2 * self.gamma ** (self.offset + nonempty) / (self.gamma + 1)
+        counts = self.counts[nonempty]
+        if self.zeros:
+            values = np.concatenate(([0.], values))
+            counts = np.concatenate(([self.zeros], counts))
+        return values, counts
+
+    def quantile(self, q):
+        """
+        Returns the `q`-quantile (0 <= `q` <= 1, may be an array) of the
+        values added, NaN if the sketch is empty.
+        """
+        values, counts = self.bins()
+        if len(values) == 0:
+            return np.full(np.shape(q), np.nan)[()]
+        rank = np.asarray(q) * (counts.sum() - 1)
+        return values[np.searchsorted(np.cumsum(counts), rank,
+                                      side="right")][()]
+
+    def cdf(self):
+        """
+        Returns the values representing the non-empty bins and the fraction
+        of values up to them.
+        """
+        values, counts = self.bins()
+        return values, np.cumsum(counts) / max(counts.sum(), 1)
+
+    def to_dict(self):
+        nonempty = np.flatnonzero(self.counts)
+        if len(nonempty):
+            counts = self.counts[nonempty[0]:nonempty[-1] + 1]
+            offset = self.offset + int(nonempty[0])
+        else:
+            counts = self.counts[:0]
+            offset = 0
+        return {"alpha": self.alpha, "zeros": self.zeros, "offset": offset,
+                "counts": counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, d):
+        res = cls(d["alpha"])
+        res.zeros = d["zeros"]
+        res.offset = d["offset"]
+        res.counts = np.array(d["counts"], dtype=np.int64)
+        return res
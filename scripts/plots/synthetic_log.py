@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2019 Freie Universität Berlin
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+import argparse
+import csv
+import heapq
+import logging
+import math
+import networkx as nx
+import os
+import random
+import shutil
+
+import parse_results
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2019 Freie Universität Berlin"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+MODES = ["reass", "fwd"]
+SINK_PORT = 6383
+# 64-bit interface identifier prefix of the M3 nodes' link-local addresses
+IID_PREFIX = "3432:4833:46d9"
+START_TIME = 1563000000.0
+# fragment payload per link-layer frame, roughly what fits into an
+# IEEE 802.15.4 frame besides the headers
+FRAG_SIZE = 80
+# errno printed by the source when sock_udp_send() fails (ENOMEM)
+SEND_ERRNO = 12
+
+DEFAULT_NODES = 50
+DEFAULT_COUNT = 100
+DEFAULT_DATA_LEN = 80
+DEFAULT_DELAY = 10000
+DEFAULT_MODE = "fwd"
+DEFAULT_LOSS = 0.02
+DEFAULT_ERR_RATE = 0.005
+
+
+def _lla(i):
+    return "fe80::{}:{:x}".format(IID_PREFIX, 0x8000 + i)
+
+
+def _random_tree(nodes, rng):
+    graph = nx.Graph()
+    names = ["m3-{}".format(i) for i in range(1, nodes + 1)]
+    for i, name in enumerate(names[1:], 1):
+        graph.add_edge(names[rng.randrange(i)], name, weight=1.0)
+    return graph, "{}x{:x}".format(names[0], 0xc0de0000 + nodes)
+
+
+def _load_network(data_path, edgelist, nodes, rng):
+    if edgelist is None:
+        graph, network = _random_tree(nodes, rng)
+        nx.write_edgelist(graph, parse_results._edgelist_name(network,
+                                                              data_path),
+                          data=["weight"])
+        return graph, network
+    network = os.path.basename(edgelist)[:-len(".edgelist.gz")]
+    target = parse_results._edgelist_name(network, data_path)
+    if not os.path.exists(target) or \
+       not os.path.samefile(edgelist, target):
+        shutil.copy(edgelist, target)
+    return nx.read_edgelist(edgelist, data=[("weight", float)]), network
+
+
+def _write_link_local(network, data_path, names):
+    with open(parse_results._lla_csvname(network, data_path), "w") \
+            as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["node", "iface", "lla"])
+        for i, name in enumerate(names):
+            writer.writerow([name, 6, _lla(i)])
+
+
+def _ifconfig(rng, now, node, lla, l2_stats=None):
+    iid = lla.split(":")[-1]
+    hwaddr = "{}:{}".format(iid[:-2].upper() or "0", iid[-2:].upper())
+    lines = [
+        "> ifconfig",
+        "Iface  6  HWaddr: {}  Channel: 26  Page: 0  NID: 0x23"
+        .format(hwaddr),
+        "          Long HWaddr: 36:32:48:33:46:D9:{}".format(hwaddr),
+        "           TX-Power: 0dBm  State: IDLE  max. Retrans.: 3  "
+        "CSMA Retries: 4",
+        "          AUTOACK  ACK_REQ  CSMA  L2-PDU:102 MTU:1280  HL:64  RTR",
+        "          RTR_ADV  6LO  IPHC",
+        "          Source address length: 8",
+        "          Link type: wireless",
+        "          inet6 addr: {}  scope: local  VAL".format(lla),
+        "          inet6 addr: {}  scope: global  VAL"
+        .format(parse_results._link_local_to_global(lla)),
+        "          inet6 group: ff02::2",
+        "          inet6 group: ff02::1",
+        "          inet6 group: ff02::1:ffd9:{}".format(iid),
+        "          ",
+    ]
+    if l2_stats is None:
+        l2_stats = (rng.randint(0, 20), 0, 0)
+    tx, errors, retrans = l2_stats
+    lines.extend([
+        "          Statistics for Layer 2",
+        "            RX packets {}  bytes {}".format(tx, tx * 102),
+        "            TX packets {} (Multicast: 2)  bytes {}"
+        .format(tx + errors, (tx + errors) * 102),
+        "            TX succeeded {} errors {} retransmissions {}"
+        .format(tx, errors, retrans),
+        "          Statistics for IPv6",
+        "            RX packets {}  bytes {}".format(tx, tx * 80),
+        "            TX packets {} (Multicast: 2)  bytes {}"
+        .format(tx, tx * 80),
+        "            TX succeeded {} errors 0".format(tx),
+        "",
+    ])
+    return [(now, node, line) for line in lines]
+
+
+def _source_events(rng, node, lla, sink, sink_lla, hops, start, count,
+                   data_len, delay, loss, err_rate, latency):
+    """
+    Yields the output of source `node` and the resulting output of the sink
+    in order of time.
+    """
+    addr = parse_results._link_local_to_global(lla)
+    delay_min = (delay / 2) / 1000
+    delay_max = (delay + delay / 2) / 1000
+    yield (start, node, "> source {} {} {} {} {}"
+           .format(parse_results._link_local_to_global(sink_lla),
+                   SINK_PORT, data_len, count, delay))
+    yield (start, node, "start sending: data_len: {}".format(data_len))
+    yield (start, node, "               num: {}".format(count))
+    yield (start, node, "               delay min: {}"
+           .format(int(delay_min * 1000000)))
+    yield (start, node, "               delay max: {}"
+           .format(int(delay_max * 1000000)))
+    # receptions at the sink, as they may overtake each other
+    pending = []
+    now = start
+    # the source thread prints after the shell printed its prompt again
+    prompt = "> "
+    for pkt_id in range(count):
+        now += rng.uniform(delay_min, delay_max)
+        while pending and pending[0][0] <= now:
+            yield heapq.heappop(pending)
+        if rng.random() < err_rate:
+            yield (now, node, "{}err;{:04x};{}".format(prompt,
+                                                       pkt_id & 0xffff,
+                                                       SEND_ERRNO))
+            prompt = ""
+            continue
+        yield (now, node, "{}out;{:04x}".format(prompt, pkt_id & 0xffff))
+        prompt = ""
+        if rng.random() < (1 - loss) ** hops:
+            recv_time = now + sum(latency(rng) for _ in range(hops))
+            heapq.heappush(pending, (
+                recv_time, sink, "in;{:04x};{};{}"
+                .format(pkt_id & 0xffff, addr, SINK_PORT)
+            ))
+    while pending:
+        yield heapq.heappop(pending)
+
+
+def _write_events(log, events):
+    lines = 0
+    for now, node, line in events:
+        log.write("{:.6f};{};{}\n".format(now, node, line))
+        lines += 1
+    return lines
+
+
+def generate_log(data_path, edgelist=None, nodes=DEFAULT_NODES,
+                 count=DEFAULT_COUNT, data_len=DEFAULT_DATA_LEN,
+                 mode=DEFAULT_MODE, delay=DEFAULT_DELAY, loss=DEFAULT_LOSS,
+                 err_rate=DEFAULT_ERR_RATE, seed=None):
+    """
+    Writes a synthetic serial aggregator log of an experiment run to
+    `data_path`, as `run_experiment.py` would record it, together with the
+    network's edge-list and link-local addresses `parse_results` requires.
+
+    The network is read from `edgelist` or, if it is not given, a random
+    tree of `nodes` nodes. Each source sends `count` packets of `data_len`
+    bytes with a mean `delay` (in ms) to the sink, each hop loses a packet
+    with probability `loss` and sending fails with probability `err_rate`.
+    Returns the name of the log and its number of lines.
+    """
+    rng = random.Random(seed)
+    graph, network = _load_network(data_path, edgelist, nodes, rng)
+    sink = network.split("x")[0]
+    names = sorted(graph.nodes(), key=parse_results.node_num)
+    llas = {name: _lla(i) for i, name in enumerate(names)}
+    _write_link_local(network, data_path, names)
+    hops = nx.single_source_shortest_path_length(graph, sink)
+    # run_experiment.py does not use the sink's neighbors as sources
+    sources = [n for n in names
+               if n != sink and n not in graph[sink] and n in hops]
+    frags = math.ceil(data_len / FRAG_SIZE)
+    if mode == "reass":
+        def latency(rng):
+            # all fragments are received before the packet is forwarded
+            return frags * rng.uniform(0.004, 0.012)
+    else:
+        def latency(rng):
+            # fragments are pipelined along the path
+            return rng.uniform(0.004, 0.012) + (frags - 1) * 0.001
+    logname = os.path.join(
+        data_path, "lcn19_n{}_c26__m{}_r{}Bx{}x{}ms_{}.log"
+        .format(network, mode, data_len, count, delay, int(START_TIME))
+    )
+    now = START_TIME
+    with open(logname, "w") as log:
+        lines = 0
+        for name in names:
+            now += 0.001
+            lines += _write_events(log, _ifconfig(rng, now, name,
+                                                  llas[name]))
+        now += 3
+        lines += _write_events(log, [
+            (now, sink, "> starting experiment"),
+            (now, sink, "shell: command not found: starting"),
+        ])
+        events = []
+        for i, source in enumerate(sources):
+            start = now + (i * 0.01) + rng.uniform(0, delay / 1000)
+            events.append(_source_events(
+                random.Random(rng.random()), source, llas[source], sink,
+                llas[sink], hops[source], start, count, data_len, delay,
+                loss, err_rate, latency
+            ))
+        lines += _write_events(log, heapq.merge(*events))
+        now += (count * (delay / 1000)) + (delay / 1000) + 120
+        # 6lo_frag
+        stats = []
+        for name in names:
+            stats.append((now, name, "> 6lo_frag"))
+            stats.append((now, name, "rbuf full: {}"
+                          .format(rng.randint(0, count // 10))))
+            if mode == "fwd":
+                stats.append((now, name, "VRB full: {}"
+                              .format(rng.randint(0, count // 10))))
+        lines += _write_events(log, stats)
+        # ifconfig
+        successors = nx.bfs_tree(graph, sink)
+        now += 3
+        for name in names:
+            if name not in successors:
+                continue
+            forwarded = len(nx.descendants(successors, name)) + 1
+            tx = forwarded * count * frags
+            l2_stats = (tx, int(tx * loss),
+                        int(tx * rng.uniform(0.05, 0.3)))
+            lines += _write_events(log, _ifconfig(rng, now, name,
+                                                  llas[name], l2_stats))
+        # pktbuf, after waiting for the queues to empty
+        now += 120
+        for name in names:
+            usage = rng.randint(100, 4000)
+            lines += _write_events(log, [
+                (now, name, "> pktbuf"),
+                (now, name, "packet buffer: first byte: 0x20000a10, "
+                            "last byte: 0x20001a10 (size: 4096)"),
+                (now, name, "  position of last byte used: {}"
+                            .format(usage)),
+                (now, name, "~ unused: 0x20000a10 (next: 0, size: 4096) ~"),
+            ])
+    return logname, lines
+
+
+def main():
+    logging.basicConfig(format='%(levelname)s: %(message)s',
+                        level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-f", "--edgelist-file", default=None,
+                        help="NetworkX edge-list of the network (default: a "
+                             "random tree of --nodes nodes)")
+    parser.add_argument("-n", "--nodes", default=DEFAULT_NODES, type=int,
+                        help="Number of nodes of the random network "
+                             "(default: {})".format(DEFAULT_NODES))
+    parser.add_argument("-c", "--count", default=DEFAULT_COUNT, type=int,
+                        help="Number of packets per source "
+                             "(default: {})".format(DEFAULT_COUNT))
+    parser.add_argument("-l", "--data-len", default=DEFAULT_DATA_LEN,
+                        type=int,
+                        help="Payload size of the packets "
+                             "(default: {})".format(DEFAULT_DATA_LEN))
+    parser.add_argument("-W", "--delay", default=DEFAULT_DELAY, type=int,
+                        help="Mean delay between packets in ms "
+                             "(default: {})".format(DEFAULT_DELAY))
+    parser.add_argument("-L", "--loss", default=DEFAULT_LOSS, type=float,
+                        help="Probability of a packet being lost per hop "
+                             "(default: {})".format(DEFAULT_LOSS))
+    parser.add_argument("-s", "--seed", default=None, type=int,
+                        help="Seed for the random number generator")
+    parser.add_argument("data_path",
+                        help="Directory to write the log and network to")
+    parser.add_argument("mode", default=DEFAULT_MODE, choices=MODES,
+                        nargs="?",
+                        help="Experiment mode (default: {})"
+                             .format(DEFAULT_MODE))
+    args = parser.parse_args()
+    logname, lines = generate_log(
+        args.data_path, args.edgelist_file, args.nodes, args.count,
+        args.data_len, args.mode, args.delay, args.loss, seed=args.seed
+    )
+    logging.info("Wrote {} lines to {}".format(lines, logname))
+
+
+if __name__ == "__main__":
+    main()
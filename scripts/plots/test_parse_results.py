@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2019 Freie Universität Berlin
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+import os
+import re
+import shutil
+import tempfile
+import time
+import unittest
+import unittest.mock
+
+import numpy as np
+
+import parse_results
+import synthetic_log
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2019 Freie Universität Berlin"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+class LogToCsvsTest(unittest.TestCase):
+    def setUp(self):
+        self.data_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_path)
+        self.logname, _ = synthetic_log.generate_log(
+            self.data_path, nodes=10, count=20, seed=1
+        )
+
+    def _compress_log(self):
+        with open(self.logname, "rb") as logfile, \
+                parse_results.open_file(self.logname + ".zst", "wb") \
+                as zst_logfile:
+            shutil.copyfileobj(logfile, zst_logfile)
+        os.remove(self.logname)
+        self.logname += ".zst"
+
+    def _log_to_csvs(self, **kwargs):
+        match = re.search(parse_results.LOG_NAME_PATTERN, self.logname)
+        kwargs.update(parse_results.match_to_dict(match))
+        return parse_results.log_to_csvs(self.logname,
+                                         data_path=self.data_path, **kwargs)
+
+    def _assert_rows_equal(self, actual, desired):
+        self.assertEqual(actual.dtype, desired.dtype)
+        # compare by column, so NaNs count as equal
+        for name in desired.dtype.names:
+            np.testing.assert_array_equal(actual[name], desired[name])
+
+    @unittest.skipIf(parse_results.zstandard is None,
+                     "zstandard not installed")
+    def test_zst_log(self):
+        self._compress_log()
+        outputs = self._log_to_csvs(compression="zst")
+        self.assertIsNotNone(outputs)
+        times_csvname, stats_csvname, times_npyname, stats_npyname = \
+            outputs[:4]
+        self.assertTrue(times_csvname.endswith(".times.csv.zst"))
+        times = np.load(times_npyname)
+        stats = np.load(stats_npyname)
+        self.assertGreater(len(times), 0)
+        # parse the compressed CSVs instead of loading the .npy files
+        os.remove(times_npyname)
+        os.remove(stats_npyname)
+        self._assert_rows_equal(parse_results.load_times(times_csvname),
+                                times)
+        self._assert_rows_equal(parse_results.load_stats(stats_csvname),
+                                stats)
+
+    def test_npy_loaded(self):
+        finish = parse_results._NpyWriter.finish
+
+        def slow_finish(npy):
+            finish(npy)
+            # let the CSVs be closed noticeably later
+            time.sleep(0.05)
+
+        with unittest.mock.patch.object(parse_results._NpyWriter, "finish",
+                                        slow_finish):
+            outputs = self._log_to_csvs()
+        self.assertIsNotNone(outputs)
+        for csvname, load in [(outputs[0], parse_results.load_times),
+                              (outputs[1], parse_results.load_stats)]:
+            # memory-mapped from the .npy file instead of parsing the CSV
+            self.assertIsInstance(load(csvname), np.memmap)
+
+    def _duplicate_receptions(self, every):
+        # repeat every `every`th reception right after it
+        with open(self.logname) as logfile:
+            lines = logfile.readlines()
+        receptions = 0
+        with open(self.logname, "w") as logfile:
+            for line in lines:
+                logfile.write(line)
+                if ";in;" in line:
+                    receptions += 1
+                    if receptions % every == 0:
+                        logfile.write(line)
+        return receptions // every
+
+    def test_stream_counts_duplicates(self):
+        duplicates = self._duplicate_receptions(7)
+        self.assertGreater(duplicates, 0)
+        outputs = self._log_to_csvs()
+        times = np.load(outputs[2])
+        summary = parse_results.load_summary(outputs[4])
+        self.assertEqual(times["duplicates"].sum(), duplicates)
+        stream_outputs = self._log_to_csvs(stream=True)
+        self._assert_rows_equal(np.load(stream_outputs[2]), times)
+        self.assertEqual(parse_results.load_summary(stream_outputs[4])["sent"],
+                         summary["sent"])
+
+    def test_touched_log_hashed_once(self):
+        parse_results.logs_to_csvs(self.data_path, incremental=True)
+        stat = os.stat(self.logname)
+        os.utime(self.logname, ns=(stat.st_atime_ns,
+                                   stat.st_mtime_ns + 10 ** 9))
+        for hashed in [1, 0]:
+            with unittest.mock.patch.object(
+                parse_results, "_sha1", wraps=parse_results._sha1
+            ) as sha1, unittest.mock.patch.object(
+                parse_results, "_convert_log"
+            ) as convert_log:
+                parse_results.logs_to_csvs(self.data_path, incremental=True)
+            convert_log.assert_not_called()
+            self.assertEqual([c for c in sha1.call_args_list
+                              if c.args == (self.logname,)],
+                             hashed * [unittest.mock.call(self.logname)])
+
+    def test_partial_outputs_removed(self):
+        with unittest.mock.patch.object(parse_results, "_parse_log",
+                                        side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self._log_to_csvs()
+        for output in parse_results._all_outputs(self.logname):
+            self.assertFalse(os.path.exists(output), output)
+
+
+if __name__ == "__main__":
+    unittest.main()
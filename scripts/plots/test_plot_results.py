@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2019 Freie Universität Berlin
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+import re
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import parse_results
+import plot_results
+import synthetic_log
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2019 Freie Universität Berlin"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+# (mode, data_len) of the runs converted for the tests
+RUNS = [("fwd", 16), ("fwd", 176), ("reass", 80)]
+
+
+def _reject_outliers(data, m=2):
+    # outlier rejection of the latency plot before the summaries
+    d = np.abs(data - np.median(data))
+    mdev = np.median(d)
+    s = d / mdev if mdev else 0.
+    data = np.array(data)
+    return data[s < m]
+
+
+class LatStatsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_path = tempfile.mkdtemp()
+        for seed, (mode, data_len) in enumerate(RUNS):
+            logname, _ = synthetic_log.generate_log(
+                cls.data_path, nodes=30, count=50, data_len=data_len,
+                mode=mode, delay=plot_results.DELAY, seed=seed
+            )
+            match = re.search(parse_results.LOG_NAME_PATTERN, logname)
+            parse_results.log_to_csvs(logname, data_path=cls.data_path,
+                                      **parse_results.match_to_dict(match))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.data_path)
+
+    def _expected(self, dataset):
+        # mean and standard deviation as computed by plot_lat() before the
+        # summaries
+        hop_counts = plot_results.MAX_HOPS - 2
+        shape = (len(plot_results.MODES), len(plot_results.DATA_LENS),
+                 hop_counts)
+        means = np.full(shape, np.nan)
+        errs = np.full(shape, np.nan)
+        for o, mode in enumerate(plot_results.MODES):
+            for i, data_len in enumerate(plot_results.DATA_LENS):
+                latencies = [[] for _ in range(hop_counts)]
+                for _, _, times in dataset.runs("times", mode, data_len, 1):
+                    times = times[~np.isnan(times["recv_time"])]
+                    hops = times["hops_to_sink"] - 2
+                    latency = 1000 * (times["recv_time"] - times["send_time"])
+                    for h in range(hop_counts):
+                        latencies[h].extend(latency[hops == h])
+                for h in range(hop_counts):
+                    if latencies[h]:
+                        values = _reject_outliers(latencies[h])
+                        means[o, i, h] = np.mean(values)
+                        errs[o, i, h] = np.std(values)
+        return means, errs
+
+    def test_lat_stats(self):
+        dataset = plot_results.Dataset(self.data_path)
+        expected_means, expected_errs = self._expected(dataset)
+        self.assertGreater(np.count_nonzero(np.isfinite(expected_means)), 0)
+        _, means, errs = plot_results.lat_stats(dataset, runs=1)
+        np.testing.assert_allclose(means, expected_means)
+        np.testing.assert_allclose(errs, expected_errs)
+
+
+if __name__ == "__main__":
+    unittest.main()